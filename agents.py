@@ -0,0 +1,32 @@
+from q_lambda import QLambdaCausal
+from tile_coding import QLambdaTiles
+
+# Representações de valor disponíveis para o agente (chave AGENT das configurações)
+AGENT_TYPES = ('grid', 'tiles')
+
+def make_agent(agent_type, num_tilings=8, trace_tolerance=1e-3, **agent_args):
+    """
+    Cria o agente Q(λ) da representação escolhida: QLambdaCausal para 'grid' (grade única)
+    ou QLambdaTiles para 'tiles'. Os demais argumentos são repassados ao construtor.
+    """
+    if agent_type == 'tiles':
+        return QLambdaTiles(num_tilings=num_tilings, trace_tolerance=trace_tolerance, **agent_args)
+    if agent_type == 'grid':
+        return QLambdaCausal(**agent_args)
+    raise ValueError(f"Agente inválido: {agent_type}. Use um de {AGENT_TYPES}.")
+
+def load_agent(q_matrix, params):
+    """Cria o agente de avaliação (sem aprendizado) adequado a um modelo salvo por train.py."""
+    q_agent = make_agent(
+        params.get('AGENT', 'grid'),
+        num_tilings=params.get('N_TILINGS', 8),
+        dims=(params['N_POSITION'], params['N_ANGLE'], params['N_VELOCITY'], params['N_ANGULAR_VELOCITY']),
+        num_actions=q_matrix.shape[-1],
+        alpha=0, lambda_=0, gamma=0, # Hiperparâmetros não são usados na avaliação
+        pos_limit=params['POSITION_LIMIT'],
+        angle_limit=params['ANGLE_LIMIT_RADS'],
+        vel_limit=params['VELOCITY_LIMIT'],
+        ang_vel_limit=params['ANGULAR_VELOCITY_LIMIT'],
+    )
+    q_agent.q_matrix = q_matrix
+    return q_agent
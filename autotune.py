@@ -0,0 +1,205 @@
+import argparse
+import importlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Este módulo é importado por train.py antes do NumPy: nada de NumPy/Gymnasium no topo.
+
+# Pasta dos perfis de desempenho, um arquivo JSON por máquina
+PROFILE_DIR = "profiles"
+
+# Variáveis lidas pelas bibliotecas de BLAS/OpenMP na importação do NumPy
+BLAS_THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+def profile_path(host=None):
+    """Caminho do perfil da máquina (profiles/<hostname>.json)."""
+    return os.path.join(PROFILE_DIR, f"{host or socket.gethostname()}.json")
+
+def load_host_profile(path=None):
+    """Carrega o perfil de desempenho desta máquina, ou None se ainda não foi calibrada."""
+    path = path or profile_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def apply_blas_threads(profile):
+    """
+    Define as threads de BLAS do perfil nas variáveis de ambiente. Precisa rodar antes da
+    importação do NumPy; valores já definidos pelo usuário têm prioridade.
+    """
+    if not profile or not profile.get('blas_threads'):
+        return None
+    for var in BLAS_THREAD_VARS:
+        os.environ.setdefault(var, str(profile['blas_threads']))
+    return profile['blas_threads']
+
+def default_workers(fallback):
+    """Número de processos paralelos do perfil desta máquina, ou `fallback` sem perfil."""
+    profile = load_host_profile()
+    return profile['workers'] if profile and profile.get('workers') else fallback
+
+def probe_loop(config_name, seconds, seed=0):
+    """
+    Executa o laço de treino de train.py (ambiente, discretização e passo fundido do agente)
+    por `seconds` segundos, sem logs nem gravação de arquivos.
+
+    Returns:
+        tuple: (passos de simulação, segundos medidos), sem o tempo de criação do ambiente.
+    """
+    import gymnasium as gym
+    from curriculum import apply_physics
+    from custom_termination_wrapper import CustomTerminationWrapper
+    from agents import make_agent
+
+    config = importlib.import_module(f'configs.{config_name}')
+    max_steps = config.MAX_STEPS
+    action_repeat = getattr(config, 'ACTION_REPEAT', 1)
+    q_agent = make_agent(
+        getattr(config, 'AGENT', 'grid'),
+        num_tilings=getattr(config, 'N_TILINGS', 8), trace_tolerance=getattr(config, 'TRACE_TOLERANCE', 1e-3),
+        dims=(config.N_POSITION, config.N_ANGLE, config.N_VELOCITY, config.N_ANGULAR_VELOCITY),
+        alpha=config.ALPHA, lambda_=config.LAMBDA, gamma=config.GAMMA,
+        pos_limit=config.POSITION_LIMIT, angle_limit=config.ANGLE_LIMIT_RADS,
+        vel_limit=config.VELOCITY_LIMIT, ang_vel_limit=config.ANGULAR_VELOCITY_LIMIT,
+        num_actions=2, seed=seed,
+        update_mode=getattr(config, 'UPDATE_MODE', 'online'), episode_capacity=max_steps
+    )
+    env = gym.make('InvertedPendulum-v5', render_mode=None)
+    env = gym.wrappers.TimeLimit(env, max_episode_steps=max_steps)
+    apply_physics(env, config.GRAVITY)
+    env = CustomTerminationWrapper(env, angle_limit=config.ANGLE_LIMIT_RADS, pos_limit=config.POSITION_LIMIT,
+                                   vel_limit=config.VELOCITY_LIMIT, ang_vel_limit=config.ANGULAR_VELOCITY_LIMIT)
+    observation, info = env.reset(seed=seed)
+    epsilon = config.EPSILON
+    force = config.FORCE_MAGNITUDE
+
+    total_steps = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        observation, info = env.reset()
+        action_idx = q_agent.begin_episode(q_agent.convert2state(observation), epsilon)
+        terminated = truncated = False
+        while not terminated and not truncated:
+            action_force = [-force] if action_idx == 0 else [force]
+            reward_sum, steps = 0.0, 0
+            while True:
+                observation, reward, terminated, truncated, info = env.step(action_force)
+                reward_sum += reward
+                steps += 1
+                if terminated or truncated or steps >= action_repeat:
+                    break
+            total_steps += steps
+            epsilon = max(config.MIN_EPSILON, epsilon - config.EPSILON_DECAY_RATE * steps)
+            action_idx = q_agent.step(q_agent.convert2state(observation), reward_sum, epsilon, steps,
+                                      done=terminated or truncated)
+    return total_steps, time.perf_counter() - start
+
+def run_probe(config_name, workers, blas_threads, seconds):
+    """
+    Roda `workers` sondas simultâneas, cada uma em um processo com `blas_threads` threads de BLAS.
+
+    Returns:
+        dict: Passos/s somados de todos os processos e a média por processo.
+    """
+    env = dict(os.environ)
+    for var in BLAS_THREAD_VARS:
+        env[var] = str(blas_threads)
+    cmd = [sys.executable, os.path.abspath(__file__), '--probe', config_name, '--seconds', str(seconds)]
+    processes = [subprocess.Popen(cmd + ['--seed', str(i)], env=env, stdout=subprocess.PIPE, text=True)
+                 for i in range(workers)]
+    rates = []
+    for process in processes:
+        out, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Sonda falhou (código {process.returncode}).")
+        result = json.loads(out.strip().splitlines()[-1])
+        rates.append(result['steps'] / result['elapsed'])
+    return {
+        'workers': workers,
+        'blas_threads': blas_threads,
+        'steps_per_second': sum(rates),
+        'steps_per_second_per_worker': sum(rates) / len(rates),
+    }
+
+def calibrate(config_name, worker_counts, blas_options, seconds, tolerance=0.03):
+    """Sonda todas as combinações e retorna o perfil com a de maior vazão total."""
+    probes = []
+    for blas_threads in blas_options:
+        for workers in worker_counts:
+            result = run_probe(config_name, workers, blas_threads, seconds)
+            probes.append(result)
+            print(f"  {workers:3} processo(s), {blas_threads:2} thread(s) de BLAS: "
+                  f"{result['steps_per_second']:9.0f} passos/s ({result['steps_per_second_per_worker']:.0f} por processo)")
+
+    # Entre as combinações a até `tolerance` da melhor vazão, fica a mais barata (menos processos e threads),
+    # para que ganhos dentro do ruído de medição não ocupem núcleos à toa
+    top = max(p['steps_per_second'] for p in probes)
+    best = min((p for p in probes if p['steps_per_second'] >= (1 - tolerance) * top),
+               key=lambda p: (p['workers'], p['blas_threads']))
+    config = importlib.import_module(f'configs.{config_name}')
+    return {
+        'host': socket.gethostname(),
+        'cpu_count': os.cpu_count(),
+        'calibrated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'config': config_name,
+        'grid': f"{config.N_POSITION}x{config.N_ANGLE}x{config.N_VELOCITY}x{config.N_ANGULAR_VELOCITY}",
+        'workers': best['workers'],
+        'blas_threads': best['blas_threads'],
+        'steps_per_second': best['steps_per_second'],
+        'probes': probes,
+    }
+
+def default_worker_counts(cpu_count):
+    """1, 2, 4, ... até o número de núcleos (incluído)."""
+    counts = []
+    n = 1
+    while n < cpu_count:
+        counts.append(n)
+        n *= 2
+    return counts + [cpu_count]
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibra o paralelismo do treino para esta máquina')
+    parser.add_argument('config', nargs='?', default='Qlambda2', help='Configuração usada nas sondas (módulo em configs/)')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=None,
+                        help='Números de processos testados (padrão: 1, 2, 4, ... até os núcleos)')
+    parser.add_argument('-b', '--blas-threads', type=int, nargs='+', default=None,
+                        help='Threads de BLAS testadas (padrão: 1 e o número de núcleos)')
+    parser.add_argument('-t', '--seconds', type=float, default=5.0, help='Duração de cada sonda')
+    parser.add_argument('--tolerance', type=float, default=0.03,
+                        help='Margem relativa dentro da qual a combinação mais barata é preferida')
+    parser.add_argument('-o', '--output', default=None, help='Arquivo do perfil (padrão: profiles/<hostname>.json)')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, default=0, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.probe:
+        # Processo de sonda: imprime só o resultado em JSON para o calibrador
+        steps, elapsed = probe_loop(args.config, args.seconds, args.seed)
+        print(json.dumps({'steps': steps, 'elapsed': elapsed}))
+        return
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = args.workers or default_worker_counts(cpu_count)
+    blas_options = args.blas_threads or sorted({1, cpu_count})
+
+    print(f"Calibrando '{args.config}' em {socket.gethostname()} ({cpu_count} núcleos), {args.seconds:g}s por sonda...")
+    profile = calibrate(args.config, worker_counts, blas_options, args.seconds, args.tolerance)
+
+    output = args.output or profile_path()
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    print(f"Melhor: {profile['workers']} processo(s), {profile['blas_threads']} thread(s) de BLAS, "
+          f"{profile['steps_per_second']:.0f} passos/s. Perfil salvo em '{output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import time
+import numpy as np
+from q_lambda import QLambdaCausal, UPDATE_MODES
+
+# Discretizações comparadas: a das configurações atuais e grades mais finas
+DEFAULT_GRIDS = ['5x7x5x7', '9x11x9x11', '15x21x15x21']
+
+def make_episodes(state_dims, num_episodes, episode_length, seed):
+    """Gera episódios sintéticos (estados e recompensas) iguais para todos os modos."""
+    rng = np.random.default_rng(seed)
+    states = np.stack([rng.integers(0, d, size=(num_episodes, episode_length + 1)) for d in state_dims], axis=-1)
+    return [[tuple(s) for s in episode.tolist()] for episode in states]
+
+def benchmark(update_mode, state_dims, episodes, lambda_, seed):
+    """
+    Mede o tempo do agente (escolha da ação + atualização) por decisão, incluindo a
+    atualização de fim de episódio do modo episódico.
+
+    Returns:
+        float: Microssegundos por decisão.
+    """
+    q_agent = QLambdaCausal(dims=state_dims, num_actions=2, alpha=0.1, lambda_=lambda_, gamma=0.97,
+                            pos_limit=1, angle_limit=0.5, vel_limit=3, ang_vel_limit=3,
+                            seed=seed, update_mode=update_mode, episode_capacity=len(episodes[0]))
+    decisions = 0
+    start = time.perf_counter()
+    for episode in episodes:
+        q_agent.begin_episode(episode[0], 0.1)
+        last = len(episode) - 1
+        for t in range(1, len(episode)):
+            q_agent.step(episode[t], 1.0, 0.1, done=t == last)
+        decisions += last
+    return 1e6 * (time.perf_counter() - start) / decisions
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o custo por decisão dos modos de atualização do Q(λ)')
+    parser.add_argument('-g', '--grids', nargs='+', default=DEFAULT_GRIDS,
+                        help='Discretizações no formato PxAxVxW (posição, ângulo, velocidade, vel. angular)')
+    parser.add_argument('-e', '--episodes', type=int, default=20, help='Episódios sintéticos por medição')
+    parser.add_argument('-t', '--length', type=int, default=500, help='Decisões por episódio')
+    parser.add_argument('-l', '--lambda', dest='lambda_', type=float, default=0.8, help='Valor de λ')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed dos episódios sintéticos')
+
+    args = parser.parse_args()
+
+    print(f"{'Grade':<14} {'Pares (s,a)':>12} " + ''.join(f"{mode + ' (µs)':>17}" for mode in UPDATE_MODES) + f"{'Ganho':>9}")
+    for grid in args.grids:
+        state_dims = tuple(int(d) for d in grid.split('x'))
+        episodes = make_episodes(state_dims, args.episodes, args.length, args.seed)
+        times = [benchmark(mode, state_dims, episodes, args.lambda_, args.seed) for mode in UPDATE_MODES]
+        pairs = 2 * int(np.prod(state_dims))
+        print(f"{grid:<14} {pairs:>12} " + ''.join(f"{t:>17.2f}" for t in times) + f"{times[0] / times[1]:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import math
+import numpy as np
+
+class RollingWindow():
+    """
+    Janela deslizante de tamanho fixo sobre um buffer circular pré-alocado.
+    Mantém a soma e a contagem de sucessos como contadores corridos, sem percorrer a janela
+    a cada inserção.
+    """
+
+    def __init__(self, capacity, threshold=None):
+        self.capacity = capacity
+        self.threshold = threshold          # Valor mínimo para um item contar como sucesso
+        self.buffer = np.zeros(capacity)
+        self.reset()
+
+    def reset(self):
+        """Esvazia a janela."""
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.successes = 0
+
+    def append(self, value):
+        """Insere um valor, descartando o mais antigo se a janela estiver cheia."""
+        if self.count == self.capacity:
+            old = self.buffer[self.pos]
+            self.total -= old
+            if self.threshold is not None and old >= self.threshold:
+                self.successes -= 1
+        else:
+            self.count += 1
+
+        self.buffer[self.pos] = value
+        self.total += value
+        if self.threshold is not None and value >= self.threshold:
+            self.successes += 1
+        self.pos = (self.pos + 1) % self.capacity
+
+    @property
+    def full(self):
+        return self.count == self.capacity
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def success_rate(self):
+        return self.successes / self.count if self.count else 0.0
+
+    def values(self):
+        """Retorna uma visão dos valores válidos (fora de ordem cronológica)."""
+        return self.buffer[:self.count]
+
+class SuccessRateCriterion():
+    """Critério 1: taxa de sucesso na janela completa acima do alvo."""
+
+    title = "EARLY STOPPING - CONVERGÊNCIA DETECTADA"
+
+    def __init__(self, min_episodes, success_rate):
+        self.min_episodes = min_episodes
+        self.target = success_rate
+
+    def reset(self):
+        pass
+
+    def check(self, monitor, episode, reward):
+        window = monitor.rewards
+        if episode < self.min_episodes or not window.full or window.success_rate < self.target:
+            return None
+        return (f"Taxa de Sucesso: {window.success_rate:.2%} (últimos {window.capacity} episódios)\n"
+                f"Recompensa Média: {window.mean:.2f}\n"
+                f"Critério: {window.successes}/{window.capacity} episódios com recompensa ≥ {monitor.threshold}")
+
+class PlateauCriterion():
+    """
+    Critério 2: platô de desempenho.
+    A cada `block` episódios registra a recompensa média da janela; para quando as médias dos
+    últimos `window` episódios variam no máximo `tolerance` e ficam acima de `min_average`.
+    """
+
+    title = "EARLY STOPPING - PLATÔ DETECTADO"
+
+    def __init__(self, window, tolerance, min_average, block=50):
+        self.window = window
+        self.tolerance = tolerance
+        self.min_average = min_average
+        self.block = block
+        self.history = RollingWindow(max(1, window // block))
+
+    def reset(self):
+        self.history.reset()
+
+    def check(self, monitor, episode, reward):
+        if (episode + 1) % self.block != 0:
+            return None
+        self.history.append(monitor.rewards.mean)
+        if not self.history.full:
+            return None
+
+        values = self.history.values()
+        performance_range = values.max() - values.min()
+        plateau_avg = self.history.mean
+        if performance_range > self.tolerance or plateau_avg < self.min_average:
+            return None
+        return (f"Performance Estabilizada: {plateau_avg:.2f}\n"
+                f"Variação nos últimos {self.window} episódios: {performance_range:.2f}\n"
+                f"Sem melhoria significativa detectada.")
+
+class SequentialSuccessTest():
+    """
+    Teste sequencial da razão de probabilidades (SPRT de Wald) sobre o sucesso dos episódios.
+    Testa H0: p = p0 contra H1: p = p1 a cada episódio e para assim que H1 é aceita com
+    erros tipo I/II limitados por `alpha`/`beta`. Quando H0 é aceita o teste recomeça,
+    já que a política continua mudando durante o treino.
+    """
+
+    title = "EARLY STOPPING - CONVERGÊNCIA ESTATÍSTICA (SPRT)"
+
+    def __init__(self, min_episodes, p1, p0, alpha=0.05, beta=0.05):
+        if not 0 < p0 < p1 < 1:
+            raise ValueError(f"O SPRT exige 0 < p0 < p1 < 1 (recebido p0={p0}, p1={p1}).")
+        self.min_episodes = min_episodes
+        self.p0, self.p1 = p0, p1
+        self.alpha, self.beta = alpha, beta
+        # Incrementos do log da razão de verossimilhança para sucesso e falha
+        self.llr_success = math.log(p1 / p0)
+        self.llr_failure = math.log((1 - p1) / (1 - p0))
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.reset()
+
+    def reset(self):
+        self.llr = 0.0
+        self.samples = 0
+
+    def check(self, monitor, episode, reward):
+        self.samples += 1
+        self.llr += self.llr_success if reward >= monitor.threshold else self.llr_failure
+        if self.llr <= self.lower:
+            self.reset()
+            return None
+        if episode < self.min_episodes or self.llr < self.upper:
+            return None
+        return (f"H1 aceita: p ≥ {self.p1:.2%} contra p = {self.p0:.2%} "
+                f"(α={self.alpha}, β={self.beta}) após {self.samples} episódios de teste\n"
+                f"Log-razão de verossimilhança: {self.llr:.2f} ≥ {self.upper:.2f}\n"
+                f"Recompensa Média: {monitor.rewards.mean:.2f}")
+
+class ConvergenceMonitor():
+    """
+    Monitor de convergência do treino com estatísticas em O(1) por episódio.
+    Mantém a janela de recompensas recentes e avalia uma lista de critérios de parada.
+    """
+
+    def __init__(self, threshold, window, criteria=()):
+        """
+        Args:
+            threshold (float): Recompensa mínima para um episódio ser considerado sucesso.
+            window (int): Tamanho da janela de recompensas recentes.
+            criteria (list): Critérios com métodos `check(monitor, episode, reward)` e `reset()`;
+                `check` retorna um texto descritivo quando o treino deve parar, ou None.
+        """
+        self.threshold = threshold
+        self.rewards = RollingWindow(window, threshold)
+        self.criteria = list(criteria)
+
+    @property
+    def success_rate(self):
+        return self.rewards.success_rate
+
+    @property
+    def mean_reward(self):
+        return self.rewards.mean
+
+    def reset(self):
+        """Recomeça a janela e os critérios (ex.: após troca de física no currículo)."""
+        self.rewards.reset()
+        for criterion in self.criteria:
+            criterion.reset()
+
+    def update(self, episode, reward, check=True):
+        """
+        Registra a recompensa de um episódio e avalia os critérios de parada.
+
+        Args:
+            episode (int): Índice do episódio (a partir de 0).
+            reward (float): Recompensa total do episódio.
+            check (bool): Se False, apenas atualiza as estatísticas.
+
+        Returns:
+            tuple ou None: (critério, descrição) do primeiro critério satisfeito.
+        """
+        self.rewards.append(reward)
+        if not check:
+            return None
+        result = None
+        for criterion in self.criteria:
+            # Todos os critérios são avaliados para manterem seus estados atualizados
+            details = criterion.check(self, episode, reward)
+            if details is not None and result is None:
+                result = (criterion, details)
+        return result
@@ -0,0 +1,116 @@
+import argparse
+import os
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Usa backend sem interface gráfica
+import matplotlib.pyplot as plt
+from grafico import find_file_in_folders
+
+# Nomes das dimensões do estado, na ordem de STATE_DIMS
+DIMENSION_NAMES = ['Posição', 'Ângulo', 'Velocidade', 'Vel. Angular']
+
+def coverage_stats(visit_counts):
+    """
+    Calcula estatísticas de cobertura da tabela Q a partir das contagens de visitas.
+
+    Args:
+        visit_counts (np.ndarray): Contagens com formato STATE_DIMS + (ações,).
+
+    Returns:
+        dict: Totais de estados/pares, visitados, fração nunca visitada e ocupação
+            marginal (visitas por bin) de cada dimensão do estado.
+    """
+    state_visits = visit_counts.sum(axis=-1)
+    num_states = state_visits.size
+    num_pairs = visit_counts.size
+    total_visits = int(visit_counts.sum())
+
+    marginals = []
+    for dim in range(state_visits.ndim):
+        other_axes = tuple(a for a in range(state_visits.ndim) if a != dim)
+        marginals.append(state_visits.sum(axis=other_axes))
+
+    return {
+        'total_visits': total_visits,
+        'num_states': num_states,
+        'visited_states': int(np.count_nonzero(state_visits)),
+        'num_pairs': num_pairs,
+        'visited_pairs': int(np.count_nonzero(visit_counts)),
+        'never_visited_fraction': 1 - np.count_nonzero(visit_counts) / num_pairs,
+        'marginals': marginals,
+    }
+
+def format_report(stats, shape, filename):
+    """Monta o relatório de cobertura em texto."""
+    lines = [
+        "======================================================================",
+        "               RELATÓRIO DE COBERTURA DA TABELA Q",
+        "======================================================================",
+        f"Modelo: {filename}",
+        f"Formato da tabela: {shape} ({stats['num_pairs']} pares estado-ação)",
+        f"Visitas totais: {stats['total_visits']}",
+        f"Estados visitados: {stats['visited_states']}/{stats['num_states']} "
+        f"({stats['visited_states'] / stats['num_states']:.2%})",
+        f"Pares (s, a) visitados: {stats['visited_pairs']}/{stats['num_pairs']} "
+        f"({stats['visited_pairs'] / stats['num_pairs']:.2%})",
+        f"Fração nunca visitada: {stats['never_visited_fraction']:.2%}",
+        "",
+        "--- Ocupação Marginal por Dimensão (% das visitas por bin) ---",
+    ]
+    total = max(stats['total_visits'], 1)
+    for name, marginal in zip(DIMENSION_NAMES, stats['marginals']):
+        occupancy = ' '.join(f"{100 * v / total:5.1f}" for v in marginal)
+        empty_bins = int(np.count_nonzero(marginal == 0))
+        lines.append(f"{name:13}: [{occupancy}]  bins vazios: {empty_bins}/{len(marginal)}")
+    lines.append("======================================================================")
+    return '\n'.join(lines)
+
+def plot_marginals(stats, base_name, output_dir="graficos"):
+    """Salva um gráfico de barras da ocupação marginal de cada dimensão."""
+    os.makedirs(output_dir, exist_ok=True)
+    total = max(stats['total_visits'], 1)
+    fig, axes = plt.subplots(1, len(stats['marginals']), figsize=(16, 4))
+    for ax, name, marginal in zip(axes, DIMENSION_NAMES, stats['marginals']):
+        ax.bar(range(len(marginal)), 100 * marginal / total, color='steelblue')
+        ax.set_title(name)
+        ax.set_xlabel('Bin')
+        ax.set_ylabel('% das visitas')
+        ax.grid(True, alpha=0.3)
+    fig.suptitle(f'Ocupação marginal dos estados - {base_name} '
+                 f'(nunca visitado: {stats["never_visited_fraction"]:.1%})')
+    fig.tight_layout()
+    output_name = os.path.join(output_dir, f"{base_name}_cobertura.png")
+    fig.savefig(output_name, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return output_name
+
+def main():
+    parser = argparse.ArgumentParser(description='Relatório de cobertura da tabela Q a partir das contagens de visitas')
+    parser.add_argument('arquivo', help='Arquivo .npy treinado com TRACK_VISITS = True')
+    parser.add_argument('-g', '--grafico', action='store_true', help='Salva o gráfico de ocupação marginal em graficos/')
+
+    args = parser.parse_args()
+
+    file_path = find_file_in_folders(args.arquivo, ['npy', '.'])
+    if not file_path:
+        print(f"Arquivo não encontrado: {args.arquivo}")
+        return
+
+    data = np.load(file_path, allow_pickle=True).item()
+    if data.get('visit_counts') is None:
+        print(f"'{file_path}' não contém contagens de visitas. Treine com TRACK_VISITS = True na configuração.")
+        return
+
+    visit_counts = data['visit_counts']
+    if data['params'].get('AGENT', 'grid') == 'tiles':
+        # Tile coding: soma as grades deslocadas (primeiro eixo) para a ocupação por tile
+        visit_counts = visit_counts.sum(axis=0)
+    stats = coverage_stats(visit_counts)
+    print(format_report(stats, visit_counts.shape, file_path))
+
+    if args.grafico:
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        print(f"Gráfico salvo em: {plot_marginals(stats, base_name)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import numpy as np
+
+class PhysicsCurriculum():
+    """
+    Currículo de parâmetros físicos para o treino.
+    Muda GRAVITY e FORCE_MAGNITUDE ao longo do treino, avançando de estágio por
+    número de episódios (agenda) e/ou por desempenho (taxa de sucesso recente).
+    """
+
+    def __init__(self, stages):
+        """
+        Args:
+            stages (list): Lista de dicionários, um por estágio, com as chaves:
+                'GRAVITY' (float) e 'FORCE_MAGNITUDE' (float) - obrigatórias;
+                'EPISODES' (int) - avança após este número de episódios no estágio;
+                'SUCCESS_RATE' (float) - avança quando a taxa de sucesso recente atinge este valor;
+                'MIN_EPISODES' (int) - mínimo de episódios no estágio antes do gatilho por desempenho.
+                O último estágio não avança; o treino segue nele até o fim.
+        """
+        if not stages:
+            raise ValueError("O currículo precisa de pelo menos um estágio.")
+        for stage in stages:
+            if 'GRAVITY' not in stage or 'FORCE_MAGNITUDE' not in stage:
+                raise ValueError(f"Estágio sem GRAVITY/FORCE_MAGNITUDE: {stage}")
+
+        self.stages = stages
+        self.stage_idx = 0
+        self.episodes_in_stage = 0
+
+    @property
+    def current(self):
+        """Retorna o dicionário do estágio atual."""
+        return self.stages[self.stage_idx]
+
+    @property
+    def is_final_stage(self):
+        """Indica se o currículo já chegou ao último estágio."""
+        return self.stage_idx == len(self.stages) - 1
+
+    def step(self, success_rate):
+        """
+        Registra o fim de um episódio e decide se o currículo avança.
+
+        Args:
+            success_rate (float): Taxa de sucesso recente no estágio atual.
+
+        Returns:
+            bool: True se houve troca de estágio.
+        """
+        self.episodes_in_stage += 1
+        if self.is_final_stage:
+            return False
+
+        stage = self.current
+        by_schedule = 'EPISODES' in stage and self.episodes_in_stage >= stage['EPISODES']
+        by_performance = (
+            'SUCCESS_RATE' in stage and
+            self.episodes_in_stage >= stage.get('MIN_EPISODES', 0) and
+            success_rate >= stage['SUCCESS_RATE']
+        )
+
+        if by_schedule or by_performance:
+            self.stage_idx += 1
+            self.episodes_in_stage = 0
+            return True
+        return False
+
+def apply_physics(env, gravity):
+    """Aplica a gravidade diretamente no modelo MuJoCo do ambiente (eixo Z, negativa)."""
+    env.unwrapped.model.opt.gravity[2] = -gravity
+
+def load_warm_start(filename, expected_shape):
+    """
+    Carrega a matriz Q de um modelo treinado (possivelmente com outra física)
+    para inicializar um novo treino.
+
+    Args:
+        filename (str): Caminho do arquivo .npy salvo por train.py.
+        expected_shape (tuple): Formato esperado da matriz Q (estados + ações).
+
+    Returns:
+        tuple: (q_matrix, params) do modelo carregado.
+    """
+    saved_data = np.load(filename, allow_pickle=True).item()
+    q_matrix = saved_data['q_matrix']
+    if q_matrix.shape != tuple(expected_shape):
+        raise ValueError(
+            f"Matriz Q de '{filename}' tem formato {q_matrix.shape}, "
+            f"mas a configuração atual espera {tuple(expected_shape)}."
+        )
+    return q_matrix.copy(), saved_data.get('params', {})
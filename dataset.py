@@ -0,0 +1,135 @@
+import json
+import os
+import time
+import numpy as np
+
+# Pasta padrão dos conjuntos de transições gravados
+DATASET_DIR = "datasets"
+
+# Colunas gravadas para cada transição e seus tipos
+COLUMNS = {
+    'state': np.int32,       # Índice achatado do estado s_t
+    'action': np.int8,       # Ação a_t
+    'reward': np.float32,    # Recompensa (soma descontada se a ação foi mantida por vários passos)
+    'next_state': np.int32,  # Índice achatado do estado s_{t+k}
+    'done': np.bool_,        # Episódio terminou por violar um limite (sem bootstrap)
+    'steps': np.uint8,       # Número k de passos de simulação da transição
+}
+
+class TransitionRecorder():
+    """
+    Gravador de transições (s, a, r, s', done) em colunas pré-alocadas e mapeadas em memória.
+    Cada execução grava uma pasta com blocos ('chunks') de tamanho fixo; o custo por passo é
+    apenas a escrita de alguns escalares em arrays já existentes.
+    """
+
+    def __init__(self, run_name, state_dims, num_actions, params=None,
+                 directory=DATASET_DIR, chunk_size=100_000):
+        """
+        Args:
+            run_name (str): Nome da execução (pasta dentro de `directory`).
+            state_dims (tuple): Dimensões do espaço de estados discretizado.
+            num_actions (int): Número de ações.
+            params (dict): Parâmetros físicos/de discretização salvos junto ao conjunto.
+            directory (str): Pasta raiz dos conjuntos.
+            chunk_size (int): Número de transições por bloco.
+        """
+        self.path = os.path.join(directory, f"{run_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(self.path, exist_ok=True)
+        self.state_dims = tuple(int(d) for d in state_dims)
+        self.num_actions = num_actions
+        self.chunk_size = chunk_size
+        # Passos para achatar o índice (i0, i1, i2, i3) sem chamar np.ravel_multi_index a cada passo
+        self.strides = tuple(int(np.prod(self.state_dims[i + 1:])) for i in range(len(self.state_dims)))
+
+        self.meta = {
+            'state_dims': self.state_dims,
+            'num_actions': num_actions,
+            'params': params or {},
+            'chunks': [],
+        }
+        self.total = 0
+        self._open_chunk()
+
+    def _open_chunk(self):
+        """Pré-aloca um novo bloco de colunas em disco."""
+        chunk_name = f"chunk_{len(self.meta['chunks']):05d}"
+        chunk_path = os.path.join(self.path, chunk_name)
+        os.makedirs(chunk_path, exist_ok=True)
+        self.columns = {
+            name: np.lib.format.open_memmap(os.path.join(chunk_path, f"{name}.npy"), mode='w+',
+                                            dtype=dtype, shape=(self.chunk_size,))
+            for name, dtype in COLUMNS.items()
+        }
+        # Referências locais para evitar buscas no dicionário no caminho crítico
+        self._state, self._action, self._reward = self.columns['state'], self.columns['action'], self.columns['reward']
+        self._next_state, self._done, self._steps = self.columns['next_state'], self.columns['done'], self.columns['steps']
+        self.meta['chunks'].append({'name': chunk_name, 'length': 0})
+        self.pos = 0
+
+    def flat_index(self, state_idx):
+        """Converte o índice de estado (tupla) em um inteiro."""
+        return sum(i * s for i, s in zip(state_idx, self.strides))
+
+    def append(self, state_idx, action, reward, next_state_idx, done, steps=1):
+        """Grava uma transição."""
+        if self.pos == self.chunk_size:
+            self._close_chunk()
+            self._open_chunk()
+        pos = self.pos
+        self._state[pos] = self.flat_index(state_idx)
+        self._action[pos] = action
+        self._reward[pos] = reward
+        self._next_state[pos] = self.flat_index(next_state_idx)
+        self._done[pos] = done
+        self._steps[pos] = steps
+        self.pos += 1
+        self.total += 1
+
+    def _close_chunk(self):
+        """Descarrega o bloco atual e registra seu comprimento."""
+        for column in self.columns.values():
+            column.flush()
+        self.meta['chunks'][-1]['length'] = self.pos
+
+    def close(self):
+        """Finaliza a gravação e escreve os metadados do conjunto."""
+        self._close_chunk()
+        self.columns = {}
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2, default=repr)
+
+def load_dataset(path):
+    """
+    Carrega um conjunto gravado por TransitionRecorder.
+
+    Returns:
+        tuple: (colunas, meta), com colunas como dicionário de arrays concatenados.
+    """
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    meta['state_dims'] = tuple(meta['state_dims'])
+
+    parts = {name: [] for name in COLUMNS}
+    for chunk in meta['chunks']:
+        for name in COLUMNS:
+            column = np.load(os.path.join(path, chunk['name'], f"{name}.npy"), mmap_mode='r')
+            parts[name].append(np.asarray(column[:chunk['length']]))
+    columns = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    return columns, meta
+
+def load_datasets(paths):
+    """Carrega e concatena vários conjuntos com a mesma discretização."""
+    all_columns, meta = [], None
+    for path in paths:
+        columns, path_meta = load_dataset(path)
+        if meta is None:
+            meta = path_meta
+        elif (path_meta['state_dims'] != meta['state_dims'] or
+              path_meta['num_actions'] != meta['num_actions']):
+            raise ValueError(f"Conjunto '{path}' tem discretização diferente dos anteriores.")
+        all_columns.append(columns)
+    if meta is None:
+        raise ValueError("Nenhum conjunto informado.")
+    columns = {name: np.concatenate([c[name] for c in all_columns]) for name in COLUMNS}
+    return columns, meta
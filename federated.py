@@ -0,0 +1,110 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from autotune import default_workers
+
+class FederatedExchange():
+    """
+    Troca de matrizes Q entre trabalhadores independentes por meio de uma pasta compartilhada.
+    Cada trabalhador publica periodicamente seu snapshot (matriz Q e contagem de visitas) com
+    escrita atômica (arquivo temporário + os.replace) e lê os snapshots dos demais para
+    formar a média ponderada pelas visitas. Não há serviço de rede: basta uma pasta comum
+    (local ou montada via rede) visível a todas as máquinas.
+    """
+
+    def __init__(self, directory, worker_id):
+        self.directory = directory
+        self.worker_id = worker_id
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"worker_{worker_id:03d}.npz")
+
+    def publish(self, q_matrix, visit_counts):
+        """Publica atomicamente o snapshot deste trabalhador."""
+        fd, tmp_path = tempfile.mkstemp(prefix=f".worker_{self.worker_id:03d}_", suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, q_matrix=q_matrix, visit_counts=visit_counts)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def merge(self, q_matrix, visit_counts):
+        """
+        Calcula a média da matriz Q ponderada pelas visitas, combinando o estado local com os
+        snapshots publicados pelos outros trabalhadores. Pares sem visitas em nenhum
+        trabalhador mantêm o valor local.
+
+        Returns:
+            tuple: (matriz Q combinada, número de trabalhadores combinados).
+        """
+        weights = visit_counts.astype(np.float64)
+        weighted_sum = weights * q_matrix
+        merged_workers = 1
+
+        for path in glob.glob(os.path.join(self.directory, 'worker_*.npz')):
+            if path == self.path:
+                continue
+            try:
+                with np.load(path) as snapshot:
+                    other_q, other_counts = snapshot['q_matrix'], snapshot['visit_counts']
+            except (OSError, ValueError, KeyError, EOFError):
+                # Snapshot sendo substituído ou incompleto: fica para a próxima sincronização
+                continue
+            if other_q.shape != q_matrix.shape:
+                continue
+            weights += other_counts
+            weighted_sum += other_counts * other_q
+            merged_workers += 1
+
+        merged = q_matrix.copy()
+        visited = weights > 0
+        merged[visited] = weighted_sum[visited] / weights[visited]
+        return merged, merged_workers
+
+    def sync(self, q_agent):
+        """Publica o snapshot do agente e substitui sua matriz Q pela combinação de todos."""
+        self.publish(q_agent.q_matrix, q_agent.visit_counts)
+        merged, merged_workers = self.merge(q_agent.q_matrix, q_agent.visit_counts)
+        q_agent.q_matrix[...] = merged
+        return merged_workers
+
+def worker_seed(master_seed, worker_id):
+    """Seed de cada trabalhador: o trabalhador 0 usa MASTER_SEED; os demais derivam seeds independentes."""
+    if worker_id == 0:
+        return master_seed
+    return int(np.random.SeedSequence([master_seed, worker_id]).generate_state(1)[0])
+
+def main():
+    parser = argparse.ArgumentParser(description='Inicia vários trabalhadores federados locais de train.py')
+    parser.add_argument('config', help='Módulo de configuração em configs/')
+    parser.add_argument('-n', '--workers', type=int, default=default_workers(2),
+                        help='Número de processos locais (padrão: perfil da máquina em profiles/, ou 2)')
+    parser.add_argument('-d', '--dir', required=True, help='Pasta compartilhada de troca das matrizes Q')
+    parser.add_argument('--first-id', type=int, default=0,
+                        help='Id do primeiro trabalhador (use faixas distintas em cada máquina)')
+
+    args = parser.parse_args()
+
+    processes = []
+    for worker_id in range(args.first_id, args.first_id + args.workers):
+        log_path = os.path.join(args.dir, f"worker_{worker_id:03d}.out")
+        os.makedirs(args.dir, exist_ok=True)
+        out = open(log_path, 'w', encoding='utf-8')
+        cmd = [sys.executable, 'train.py', args.config, '--federated-dir', args.dir, '--worker-id', str(worker_id)]
+        processes.append((worker_id, subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT), out, log_path))
+        print(f"Trabalhador {worker_id} iniciado (log em '{log_path}').")
+
+    for worker_id, process, out, log_path in processes:
+        code = process.wait()
+        out.close()
+        status = "concluído" if code == 0 else f"falhou (código {code})"
+        print(f"Trabalhador {worker_id} {status}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+from collections import deque
+import numpy as np
+
+# Pasta padrão dos episódios gravados pelo registrador de voo
+FLIGHT_DIR = "flight"
+
+# Nomes das variáveis da observação, na ordem do InvertedPendulum-v5
+OBSERVATION_NAMES = ['posição', 'ângulo', 'velocidade', 'vel. angular']
+
+def violated_limits(observation, limits):
+    """Retorna os nomes das variáveis da observação que ultrapassaram seus limites."""
+    return [name for name, value, limit in zip(OBSERVATION_NAMES, observation, limits) if abs(value) > limit]
+
+class FlightRecorder():
+    """
+    Registrador de voo dos episódios de treino.
+    Mantém um buffer circular pré-alocado com (observação, índice do estado, ação, recompensa,
+    erro TD) de cada decisão, sobrescrito a cada episódio. O custo por passo é a escrita de
+    alguns escalares; o disco só é usado quando um episódio é salvo com dump().
+    """
+
+    def __init__(self, run_name, capacity, state_ndim=4, obs_dim=4, directory=FLIGHT_DIR, max_dumps=100):
+        """
+        Args:
+            run_name (str): Prefixo dos arquivos salvos.
+            capacity (int): Número de decisões guardadas (as últimas do episódio, se ele for maior).
+            state_ndim (int): Tamanho do índice do estado (dimensões da grade ou número de grades do tile coding).
+            obs_dim (int): Tamanho da observação contínua.
+            directory (str): Pasta onde os episódios são salvos.
+            max_dumps (int): Número de episódios mantidos no disco; ao passar do limite, o arquivo
+                mais antigo desta execução é apagado, para que as falhas do fim do treino sejam preservadas.
+        """
+        self.run_name = run_name
+        self.capacity = capacity
+        self.directory = directory
+        self.max_dumps = max_dumps
+        self.dumps = 0  # Episódios salvos na execução (incluindo os já apagados)
+        self.saved = deque()  # Arquivos ainda no disco, do mais antigo ao mais recente
+
+        self.observation = np.zeros((capacity, obs_dim), dtype=np.float64)
+        self.state = np.zeros((capacity, state_ndim), dtype=np.int32)
+        self.action = np.zeros(capacity, dtype=np.int8)
+        self.reward = np.zeros(capacity, dtype=np.float32)
+        self.td_error = np.zeros(capacity, dtype=np.float32)
+        self.count = 0  # Decisões registradas no episódio atual (pode passar da capacidade)
+
+    def reset(self):
+        """Inicia um novo episódio, reaproveitando os buffers."""
+        self.count = 0
+
+    def record(self, observation, state_idx, action, reward, td_error):
+        i = self.count % self.capacity
+        self.observation[i] = observation
+        self.state[i] = state_idx
+        self.action[i] = action
+        self.reward[i] = reward
+        self.td_error[i] = td_error
+        self.count += 1
+
+    def _ordered(self, column):
+        """Coluna em ordem cronológica (a mais antiga primeiro)."""
+        if self.count <= self.capacity:
+            return column[:self.count]
+        return np.roll(column, -(self.count % self.capacity), axis=0)
+
+    def dump(self, episode, meta=None):
+        """
+        Salva o episódio atual em '<directory>/<run_name>_epNNNNN.npz'.
+
+        Mantém só os `max_dumps` arquivos mais recentes, apagando o mais antigo quando necessário.
+
+        Returns:
+            str ou None: Caminho do arquivo, ou None se max_dumps for 0.
+        """
+        if self.max_dumps <= 0:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.run_name}_ep{episode + 1:05d}.npz")
+        info = {'episode': episode + 1, 'decisions': self.count, 'kept': min(self.count, self.capacity)}
+        info.update(meta or {})
+        np.savez_compressed(
+            path,
+            observation=self._ordered(self.observation),
+            state=self._ordered(self.state),
+            action=self._ordered(self.action),
+            reward=self._ordered(self.reward),
+            td_error=self._ordered(self.td_error),
+            meta=json.dumps(info, default=repr),
+        )
+        self.dumps += 1
+        self.saved.append(path)
+        while len(self.saved) > self.max_dumps:
+            oldest = self.saved.popleft()
+            if os.path.exists(oldest):
+                os.remove(oldest)
+        return path
+
+def load_flight(path):
+    """Carrega um episódio salvo: (dicionário de colunas, metadados)."""
+    with np.load(path) as data:
+        columns = {name: data[name] for name in data.files if name != 'meta'}
+        meta = json.loads(str(data['meta']))
+    return columns, meta
+
+def main():
+    parser = argparse.ArgumentParser(description='Mostra as últimas decisões de um episódio salvo pelo registrador de voo')
+    parser.add_argument('arquivo', help='Arquivo .npz em flight/')
+    parser.add_argument('-n', '--last', type=int, default=20, help='Número de decisões finais exibidas')
+
+    args = parser.parse_args()
+
+    columns, meta = load_flight(args.arquivo)
+    print(json.dumps(meta, indent=2, ensure_ascii=False))
+    total = len(columns['action'])
+    start = max(0, total - args.last)
+    print(f"\n{'#':>5} {'posição':>9} {'ângulo':>9} {'veloc.':>9} {'vel.ang.':>9}  {'estado':<14} {'ação':>4} {'recomp.':>8} {'erro TD':>9}")
+    for i in range(start, total):
+        obs = ' '.join(f"{v:9.4f}" for v in columns['observation'][i])
+        state = str(tuple(int(s) for s in columns['state'][i]))
+        print(f"{i:5} {obs}  {state:<14} {columns['action'][i]:4} {columns['reward'][i]:8.3f} {columns['td_error'][i]:9.4f}")
+
+if __name__ == "__main__":
+    main()
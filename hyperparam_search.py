@@ -0,0 +1,183 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from run_registry import RunRegistry
+from autotune import default_workers
+
+# Pasta (pacote de namespace dentro de configs/) com as configurações geradas pela busca
+SEARCH_PACKAGE = "busca"
+
+# Espaço de busca: (tipo, valores). 'log' e 'uniform' usam intervalos; 'choice' usa uma lista.
+SEARCH_SPACE = {
+    'ALPHA': ('log', (0.02, 0.3)),
+    'LAMBDA': ('uniform', (0.0, 0.95)),
+    'GAMMA': ('uniform', (0.9, 0.995)),
+    'EPSILON_DECAY_RATE': ('log', (1e-5, 5e-4)),
+    'N_POSITION': ('choice', [3, 5, 7]),
+    'N_VELOCITY': ('choice', [3, 5, 7]),
+    'N_ANGLE': ('choice', [5, 7, 9]),
+    'N_ANGULAR_VELOCITY': ('choice', [5, 7, 9]),
+}
+
+def sample_params(rng):
+    """Sorteia um conjunto de hiperparâmetros do espaço de busca."""
+    params = {}
+    for key, (kind, values) in SEARCH_SPACE.items():
+        # Valores contínuos com 3 algarismos significativos, para configurações legíveis
+        if kind == 'log':
+            params[key] = float(f"{np.exp(rng.uniform(np.log(values[0]), np.log(values[1]))):.3g}")
+        elif kind == 'uniform':
+            params[key] = float(f"{rng.uniform(*values):.3g}")
+        else:
+            params[key] = int(rng.choice(values))
+    return params
+
+def write_config(base_source, overrides, path):
+    """
+    Escreve um módulo de configuração a partir do código da configuração base,
+    substituindo os valores das linhas 'CHAVE = ...' (mantendo os comentários) e
+    acrescentando as chaves ausentes.
+    """
+    source = base_source
+    for key, value in overrides.items():
+        literal = f'"{value}"' if isinstance(value, str) else repr(value)
+        pattern = re.compile(rf"^({key}\s*=\s*)[^#\n]*?(\s*#.*)?$", re.MULTILINE)
+        if pattern.search(source):
+            source = pattern.sub(lambda m: f"{m.group(1)}{literal}{m.group(2) or ''}", source, count=1)
+        else:
+            source = source.rstrip('\n') + f"\n{key} = {literal}\n"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+
+def run_candidate(config_module, log_path):
+    """Executa train.py para uma configuração gerada e retorna o código de saída."""
+    with open(log_path, 'w', encoding='utf-8') as out:
+        result = subprocess.run([sys.executable, 'train.py', config_module], stdout=out, stderr=subprocess.STDOUT)
+    return result.returncode
+
+def score(row):
+    """Pontuação de um treino: taxa de sucesso final, desempatada pela recompensa média final."""
+    if row is None or row['status'] != 'completed':
+        return (-1.0, -1.0)
+    return (row['final_success_rate'] or 0.0, row['final_avg_reward'] or 0.0)
+
+def successive_halving(base_config, num_candidates, min_episodes, eta, max_episodes, workers, seed):
+    """
+    Busca por successive halving (um bracket do Hyperband).
+    Todos os candidatos treinam por `min_episodes`; a cada rodada só a fração 1/eta melhor
+    continua, retomando do próprio checkpoint (matriz Q e epsilon) com orçamento eta vezes maior.
+
+    Returns:
+        tuple: (hiperparâmetros do melhor candidato, registro do seu último treino).
+    """
+    rng = np.random.default_rng(seed)
+    with open(os.path.join('configs', f'{base_config}.py'), 'r', encoding='utf-8') as f:
+        base_source = f.read()
+
+    search_id = time.strftime('%Y%m%d_%H%M%S')
+    config_dir = os.path.join('configs', SEARCH_PACKAGE)
+    output_dir = os.path.join('npy', SEARCH_PACKAGE)
+    os.makedirs(config_dir, exist_ok=True)
+
+    candidates = [{'id': i, 'params': sample_params(rng), 'checkpoint': None, 'episodes': 0}
+                  for i in range(num_candidates)]
+    registry = RunRegistry()
+    budget = min_episodes
+    rung = 0
+
+    while True:
+        print(f"\n--- Rodada {rung}: {len(candidates)} candidato(s), até {budget} episódios cada ---")
+        jobs = []
+        for cand in candidates:
+            name = f"cand{search_id}_{cand['id']:03d}_r{rung}"
+            overrides = dict(cand['params'])
+            overrides.update({
+                'NUM_EPISODES': budget - cand['episodes'],
+                'FILENAME_BASE': f"{SEARCH_PACKAGE}/{name}",
+                'WARM_START_FILENAME': cand['checkpoint'],
+            })
+            if cand['checkpoint']:
+                # Retoma a exploração de onde o checkpoint parou
+                saved = np.load(cand['checkpoint'], allow_pickle=True).item()
+                overrides['EPSILON'] = float(saved['params'].get('EPSILON_FINAL', overrides.get('EPSILON', 1.0)))
+            write_config(base_source, overrides, os.path.join(config_dir, f"{name}.py"))
+            cand['module'] = f"{SEARCH_PACKAGE}.{name}"
+            cand['checkpoint_next'] = os.path.join(output_dir, f"{name}.npy")
+            jobs.append((cand, os.path.join(config_dir, f"{name}.out")))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return_codes = list(pool.map(lambda job: run_candidate(job[0]['module'], job[1]), jobs))
+
+        for (cand, out_path), code in zip(jobs, return_codes):
+            row = registry.latest(cand['module'])
+            cand['score'] = score(row)
+            if code != 0 or row is None:
+                print(f"  Candidato {cand['id']:3}: falhou (veja '{out_path}')")
+                continue
+            cand['checkpoint'] = cand['checkpoint_next']
+            cand['episodes'] += row['episodes'] or 0
+            cand['row'] = row
+            print(f"  Candidato {cand['id']:3}: Sucesso {cand['score'][0]:.2%}, Recompensa {cand['score'][1]:.1f}, "
+                  f"{cand['episodes']} episódios | " + ", ".join(f"{k}={v:.4g}" for k, v in cand['params'].items()))
+
+        candidates.sort(key=lambda c: c['score'], reverse=True)
+        keep = max(1, len(candidates) // eta)
+        if len(candidates) == 1 or budget >= max_episodes:
+            break
+        candidates = [c for c in candidates[:keep] if c['score'][0] >= 0]
+        if not candidates:
+            break
+        budget = min(budget * eta, max_episodes)
+        rung += 1
+
+    registry.close()
+    best = candidates[0] if candidates else None
+    return (best['params'], best.get('row')) if best else (None, None)
+
+def main():
+    parser = argparse.ArgumentParser(description='Busca de hiperparâmetros do Q(λ) por successive halving')
+    parser.add_argument('-b', '--base', default='Qlambda1', help='Configuração base (módulo em configs/)')
+    parser.add_argument('-n', '--candidates', type=int, default=27, help='Número inicial de candidatos')
+    parser.add_argument('-r', '--min-episodes', type=int, default=150, help='Orçamento da primeira rodada (episódios)')
+    parser.add_argument('-e', '--eta', type=int, default=3, help='Fator de redução entre rodadas')
+    parser.add_argument('-m', '--max-episodes', type=int, default=None, help='Orçamento máximo (padrão: NUM_EPISODES da base)')
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(os.cpu_count()),
+                        help='Treinos em paralelo (padrão: perfil da máquina em profiles/, ou o número de núcleos)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed da amostragem dos candidatos')
+    parser.add_argument('-o', '--output', default='QBusca', help='Nome do módulo de configuração gerado em configs/')
+
+    args = parser.parse_args()
+
+    max_episodes = args.max_episodes
+    if max_episodes is None:
+        with open(os.path.join('configs', f'{args.base}.py'), 'r', encoding='utf-8') as f:
+            max_episodes = int(re.search(r"^NUM_EPISODES\s*=\s*(\d+)", f.read(), re.MULTILINE).group(1))
+
+    start_time = time.time()
+    best_params, best_row = successive_halving(args.base, args.candidates, args.min_episodes, args.eta,
+                                               max_episodes, args.workers, args.seed)
+    if best_params is None:
+        print("Nenhum candidato concluiu o treino.")
+        return
+
+    # A configuração final treina do zero com o orçamento completo da base
+    with open(os.path.join('configs', f'{args.base}.py'), 'r', encoding='utf-8') as f:
+        base_source = f.read()
+    overrides = dict(best_params)
+    overrides['FILENAME_BASE'] = f"treino_{args.output}"
+    output_path = os.path.join('configs', f'{args.output}.py')
+    write_config(base_source, overrides, output_path)
+
+    print(f"\nBusca concluída em {time.time() - start_time:.0f}s.")
+    if best_row is not None:
+        print(f"Melhor candidato: Sucesso {best_row['final_success_rate'] or 0:.2%}, "
+              f"Recompensa {best_row['final_avg_reward'] or 0:.1f} ({best_row['output_npy']})")
+    print(f"Configuração salva em '{output_path}'. Treine com: python train.py {args.output}")
+
+if __name__ == "__main__":
+    main()
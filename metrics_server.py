@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class TrainingMetrics():
+    """
+    Contadores do treino lidos pelo servidor de métricas.
+    O laço de treino é o único escritor e só faz atribuições simples de atributos
+    (atômicas no CPython), então não há travas no caminho crítico.
+    """
+
+    def __init__(self, config_name):
+        self.config_name = config_name
+        self.start_time = time.time()
+        self.episodes = 0
+        self.env_steps = 0
+        self.epsilon = 0.0
+        self.success_rate = 0.0
+        self.update_time = 0.0      # Segundos gastos na atualização/escolha do agente
+        # Estado da última coleta, para a taxa instantânea de passos/s
+        self._last_scrape = (self.start_time, 0)
+
+    def render(self):
+        """Gera o texto no formato de exposição do Prometheus."""
+        now = time.time()
+        elapsed = now - self.start_time
+        steps = self.env_steps
+        last_time, last_steps = self._last_scrape
+        interval = now - last_time
+        self._last_scrape = (now, steps)
+
+        label = f'{{config="{self.config_name}"}}'
+        metrics = [
+            ('qlambda_episodes_total', 'counter', 'Episódios concluídos', self.episodes),
+            ('qlambda_env_steps_total', 'counter', 'Passos de simulação executados', steps),
+            ('qlambda_steps_per_second', 'gauge', 'Passos/s desde a última coleta',
+             (steps - last_steps) / interval if interval > 0 else 0.0),
+            ('qlambda_steps_per_second_avg', 'gauge', 'Passos/s médios desde o início', steps / elapsed if elapsed > 0 else 0.0),
+            ('qlambda_epsilon', 'gauge', 'Epsilon atual', self.epsilon),
+            ('qlambda_success_rate', 'gauge', 'Taxa de sucesso na janela recente', self.success_rate),
+            ('qlambda_update_time_share', 'gauge', 'Fração do tempo gasta na atualização do agente',
+             self.update_time / elapsed if elapsed > 0 else 0.0),
+            ('qlambda_uptime_seconds', 'gauge', 'Segundos desde o início do treino', elapsed),
+        ]
+        rss = resident_memory_bytes()
+        if rss is not None:
+            metrics.append(('qlambda_rss_bytes', 'gauge', 'Memória residente do processo', rss))
+
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{label} {value}")
+        return '\n'.join(lines) + '\n'
+
+def resident_memory_bytes():
+    """Memória residente (RSS) do processo atual, ou None se não for possível medir."""
+    try:
+        with open('/proc/self/status', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss é o pico (em KiB no Linux, em bytes no macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """
+    Inicia o servidor HTTP de métricas em uma thread de segundo plano.
+
+    Args:
+        metrics (TrainingMetrics): Contadores expostos em /metrics.
+        port (int): Porta local (0 escolhe uma porta livre).
+        host (str): Endereço de escuta (apenas localhost por padrão).
+
+    Returns:
+        ThreadingHTTPServer: O servidor (use server.server_address para a porta real).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Silencia o log de acessos para não poluir a saída do treino
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
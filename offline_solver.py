@@ -0,0 +1,149 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from dataset import load_datasets, DATASET_DIR
+
+def build_model(columns, num_states, num_actions, gamma):
+    """
+    Estima um MDP tabular a partir das transições gravadas.
+    Transições idênticas (s, a, s', done, k) são agrupadas, de modo que cada iteração
+    percorre apenas os pares distintos observados.
+
+    Returns:
+        dict: Arrays do modelo empírico:
+            'counts' - N(s, a) por par achatado;
+            'reward' - recompensa média por par (s, a);
+            'sa', 'next_state', 'weight' - para cada grupo, o par (s, a), o estado s' e o
+            peso P(s', done, k | s, a) * γ^k * (1 - done), usado no bootstrap.
+    """
+    sa = columns['state'].astype(np.int64) * num_actions + columns['action']
+    num_pairs = num_states * num_actions
+
+    counts = np.bincount(sa, minlength=num_pairs).astype(np.float64)
+    reward_sum = np.bincount(sa, weights=columns['reward'], minlength=num_pairs)
+    reward = np.divide(reward_sum, counts, out=np.zeros(num_pairs), where=counts > 0)
+
+    # Apenas transições não terminais fazem bootstrap
+    alive = ~columns['done']
+    discount = gamma ** columns['steps'][alive].astype(np.float64)
+    keys = np.stack([sa[alive], columns['next_state'][alive].astype(np.int64), columns['steps'][alive]], axis=1)
+    unique_keys, inverse, group_counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    group_discount = np.bincount(inverse.ravel(), weights=discount, minlength=len(unique_keys)) / group_counts
+
+    group_sa = unique_keys[:, 0]
+    weight = group_counts / counts[group_sa] * group_discount
+
+    return {
+        'counts': counts,
+        'reward': reward,
+        'sa': group_sa,
+        'next_state': unique_keys[:, 1],
+        'weight': weight,
+    }
+
+def value_iteration(model, q_init, tol=1e-6, max_iterations=10_000):
+    """
+    Iteração de valor vetorizada no MDP empírico:
+    Q(s, a) <- R(s, a) + Σ_{s'} P(s' | s, a) γ^k max_a' Q(s', a').
+    Pares (s, a) nunca observados mantêm o valor inicial.
+
+    Returns:
+        tuple: (q_matrix achatada em (estados, ações), número de iterações).
+    """
+    q = q_init.copy()
+    num_pairs = q.size
+    visited = model['counts'] > 0
+    for iteration in range(1, max_iterations + 1):
+        v = q.max(axis=1)
+        bootstrap = np.bincount(model['sa'], weights=model['weight'] * v[model['next_state']], minlength=num_pairs)
+        new_q = q.ravel().copy()
+        new_q[visited] = model['reward'][visited] + bootstrap[visited]
+        new_q = new_q.reshape(q.shape)
+        delta = np.max(np.abs(new_q - q))
+        q = new_q
+        if delta < tol:
+            break
+    return q, iteration
+
+def batch_q_learning(columns, q_init, alpha, gamma, sweeps):
+    """
+    Q-learning em lote: a cada varredura, aplica de uma vez a média dos erros TD de todas as
+    transições de cada par (s, a) com passo `alpha`.
+
+    Returns:
+        np.ndarray: q_matrix achatada em (estados, ações).
+    """
+    q = q_init.copy()
+    num_actions = q.shape[1]
+    sa = columns['state'].astype(np.int64) * num_actions + columns['action']
+    counts = np.bincount(sa, minlength=q.size)
+    visited = counts > 0
+    discount = np.where(columns['done'], 0.0, gamma ** columns['steps'].astype(np.float64))
+    for _ in range(sweeps):
+        v = q.max(axis=1)
+        td_error = columns['reward'] + discount * v[columns['next_state']] - q.ravel()[sa]
+        mean_error = np.bincount(sa, weights=td_error, minlength=q.size)
+        flat_q = q.ravel()
+        flat_q[visited] += alpha * mean_error[visited] / counts[visited]
+    return q
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera uma matriz Q a partir de transições gravadas, sem nova simulação')
+    parser.add_argument('datasets', nargs='*', help=f'Pastas de conjuntos (padrão: todas em {DATASET_DIR}/)')
+    parser.add_argument('-o', '--output', required=True, help='Arquivo .npy de saída (formato de train.py)')
+    parser.add_argument('-m', '--method', choices=['vi', 'batch-q'], default='vi',
+                        help='Iteração de valor no MDP estimado ou Q-learning em lote')
+    parser.add_argument('-g', '--gamma', type=float, default=None, help='Fator de desconto (padrão: GAMMA do conjunto)')
+    parser.add_argument('-a', '--alpha', type=float, default=0.5, help='Passo do Q-learning em lote')
+    parser.add_argument('-s', '--sweeps', type=int, default=500, help='Varreduras do Q-learning em lote')
+    parser.add_argument('--init', help='Arquivo .npy cuja matriz Q inicializa os pares não observados')
+
+    args = parser.parse_args()
+
+    paths = args.datasets or sorted(p for p in glob.glob(os.path.join(DATASET_DIR, '*'))
+                                    if os.path.exists(os.path.join(p, 'meta.json')))
+    if not paths:
+        print(f"Nenhum conjunto encontrado em '{DATASET_DIR}/'.")
+        return
+
+    start_time = time.time()
+    columns, meta = load_datasets(paths)
+    state_dims, num_actions = meta['state_dims'], meta['num_actions']
+    num_states = int(np.prod(state_dims))
+    params = dict(meta['params'])
+    gamma = args.gamma if args.gamma is not None else params.get('GAMMA', 0.97)
+    print(f"{len(columns['state'])} transições carregadas de {len(paths)} conjunto(s) em {time.time() - start_time:.2f}s.")
+
+    if args.init:
+        q_init = np.load(args.init, allow_pickle=True).item()['q_matrix'].reshape(num_states, num_actions)
+    else:
+        q_init = np.zeros((num_states, num_actions))
+
+    start_time = time.time()
+    if args.method == 'vi':
+        model = build_model(columns, num_states, num_actions, gamma)
+        q, iterations = value_iteration(model, q_init)
+        print(f"Iteração de valor convergiu em {iterations} iterações ({time.time() - start_time:.2f}s).")
+    else:
+        q = batch_q_learning(columns, q_init, args.alpha, gamma, args.sweeps)
+        print(f"Q-learning em lote: {args.sweeps} varreduras ({time.time() - start_time:.2f}s).")
+
+    coverage = np.count_nonzero(np.bincount(columns['state'].astype(np.int64) * num_actions + columns['action'],
+                                            minlength=num_states * num_actions))
+    print(f"Pares (s, a) observados: {coverage}/{num_states * num_actions}")
+
+    params.update({'GAMMA': gamma, 'OFFLINE_METHOD': args.method, 'OFFLINE_DATASETS': paths})
+    data_to_save = {
+        'q_matrix': q.reshape(tuple(state_dims) + (num_actions,)),
+        'params': params,
+    }
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    np.save(args.output, data_to_save)
+    print(f"Matriz Q salva em '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
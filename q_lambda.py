@@ -1,5 +1,12 @@
+import math
 import numpy as np
 
+# Modos de exploração suportados por QLambdaCausal
+EXPLORATION_MODES = ('epsilon', 'ucb', 'count_epsilon')
+# Modos de atualização: 'online' (visão para trás, rastros a cada passo) ou
+# 'episodic' (visão para frente, λ-retornos aplicados ao fim do episódio; usa begin_episode/step)
+UPDATE_MODES = ('online', 'episodic')
+
 class QLambdaCausal():
     """
     Implementa o algoritmo Q(λ) online.
@@ -7,7 +14,10 @@ class QLambdaCausal():
     """
     
     def __init__(self, dims, num_actions, alpha, lambda_, gamma, 
-                 pos_limit, angle_limit, vel_limit, ang_vel_limit):
+                 pos_limit, angle_limit, vel_limit, ang_vel_limit,
+                 seed=None, rng_block_size=4096, track_visits=False,
+                 exploration='epsilon', exploration_bonus=1.0,
+                 update_mode='online', episode_capacity=1024):
         
         self.alpha = alpha                                  # Taxa de aprendizado
         self.lambda_ = lambda_                              # Fator de decaimento do rastro
@@ -24,11 +34,48 @@ class QLambdaCausal():
         self.vel_limit = vel_limit
         self.ang_vel_limit = ang_vel_limit
 
+        # Gerador aleatório próprio do agente (seed int ou SeedSequence), independente do estado global
+        self.rng = np.random.default_rng(seed)
+        self.rng_block_size = rng_block_size
+        # Blocos pré-sorteados para a exploração, reabastecidos em lote quando se esgotam
+        self._uniform_block, self._uniform_pos = [], 0
+        self._action_block, self._action_pos = [], 0
+
         # Matriz Q(s, a) com valores aleatórios
-        self.q_matrix = np.random.uniform(-1, 1, size=self.q_dims)
+        self.q_matrix = self.rng.uniform(-1, 1, size=self.q_dims)
         
         # Rastros de elegibilidade para cada par (estado, ação)
         self.eligibility_traces = np.zeros(self.q_dims)
+        # Buffer pré-alocado para α * e_t * e(s,a), evitando um array temporário por passo
+        self._scratch = np.empty(self.q_dims)
+
+        # Exploração: 'epsilon' (epsilon-greedy), 'ucb' (epsilon-greedy sobre Q + c·sqrt(ln N(s) / N(s,a)))
+        # ou 'count_epsilon' (epsilon recebido escalado por min(1, c / sqrt(N(s) + 1)) em cada estado)
+        if exploration not in EXPLORATION_MODES:
+            raise ValueError(f"Modo de exploração inválido: {exploration}. Use um de {EXPLORATION_MODES}.")
+        self.exploration = exploration
+        self.exploration_bonus = exploration_bonus
+
+        # Contagem opcional de visitas (atualizações diretas) a cada par (estado, ação);
+        # obrigatória nos modos de exploração por contagem
+        track_visits = track_visits or exploration != 'epsilon'
+        self.visit_counts = np.zeros(self.q_dims, dtype=np.int32) if track_visits else None
+
+        # Erro TD e'_t da última atualização (lido pelo registrador de voo)
+        self.last_td_error = 0.0
+
+        # Modo episódico: buffers pré-alocados das transições do episódio, com os estados
+        # em índice achatado (s_0 ... s_T) para indexar a matriz Q como (estados, ações)
+        if update_mode not in UPDATE_MODES:
+            raise ValueError(f"Modo de atualização inválido: {update_mode}. Use um de {UPDATE_MODES}.")
+        self.update_mode = update_mode
+        self._strides = tuple(int(np.prod(self.state_dims[i + 1:])) for i in range(len(self.state_dims)))
+        self._ep_len = 0
+        if update_mode == 'episodic':
+            self._ep_states = np.zeros(episode_capacity + 1, dtype=np.int64)
+            self._ep_actions = np.zeros(episode_capacity, dtype=np.int64)
+            self._ep_rewards = np.zeros(episode_capacity)
+            self._ep_discounts = np.zeros(episode_capacity)
 
     def get_q_value(self, state_idx, action_idx):
         """Retorna o valor Q para um estado e ação específicos."""
@@ -40,6 +87,25 @@ class QLambdaCausal():
         # state_idx deve ser uma tupla
         return np.max(self.q_matrix[state_idx])
 
+    def _draw_uniform(self):
+        """Retorna o próximo sorteio uniforme em [0, 1) do bloco pré-gerado."""
+        if self._uniform_pos >= len(self._uniform_block):
+            # Listas Python evitam criar um escalar NumPy a cada acesso
+            self._uniform_block = self.rng.random(self.rng_block_size).tolist()
+            self._uniform_pos = 0
+        u = self._uniform_block[self._uniform_pos]
+        self._uniform_pos += 1
+        return u
+
+    def _draw_action(self):
+        """Retorna a próxima ação aleatória do bloco pré-gerado."""
+        if self._action_pos >= len(self._action_block):
+            self._action_block = self.rng.integers(0, self.num_actions, self.rng_block_size).tolist()
+            self._action_pos = 0
+        a = self._action_block[self._action_pos]
+        self._action_pos += 1
+        return a
+
     def convert2state(self, observation):
         """Discretiza a observação contínua em um índice de estado (tupla)."""
         i0_raw = (observation[0] + self.pos_limit) / (2 * self.pos_limit) * (self.state_dims[0] - 1)
@@ -65,16 +131,20 @@ class QLambdaCausal():
         Returns:
             int: O índice da ação escolhida.
         """
+        if self.exploration != 'epsilon':
+            state_idx = tuple(state_idx)
+            q_row = self.q_matrix[state_idx]
+            return self._count_based_action(state_idx, q_row, int(q_row.argmax()), epsilon)
         # Com probabilidade epsilon, escolhe uma ação aleatória (exploração)
-        if np.random.random() < epsilon:
-            return np.random.randint(0, self.num_actions)
+        if self._draw_uniform() < epsilon:
+            return self._draw_action()
         # Caso contrário, escolhe a melhor ação conhecida (explotação)
         else:
             state_idx = tuple(state_idx)
             # Retorna o índice da ação com o maior valor Q para o estado atual
             return np.argmax(self.q_matrix[state_idx])
 
-    def update(self, prev_state_idx, prev_action_idx, reward, current_state_idx):
+    def update(self, prev_state_idx, prev_action_idx, reward, current_state_idx, steps=1):
         """
         Atualiza a matriz Q usando o algoritmo Q(λ) de Peng e Williams, mas
         com a simplificação de não utilizar a lista H de pares estado-ação
@@ -83,39 +153,217 @@ class QLambdaCausal():
         Args:
             prev_state_idx (tuple): Índice do estado anterior (s_t).
             prev_action_idx (int): Índice da ação executada (a_t).
-            reward (float): Recompensa recebida (r_{t+1}).
-            current_state_idx (tuple): Índice do estado atual (s_{t+1}).
+            reward (float): Recompensa recebida (r_{t+1}). Se a ação foi mantida por vários
+                passos, a soma descontada r_{t+1} + γ r_{t+2} + ... + γ^(k-1) r_{t+k}.
+            current_state_idx (tuple): Índice do estado atual (s_{t+k}).
+            steps (int): Número k de passos de simulação em que a ação foi mantida.
         """
         # Garante que os índices de estado sejam tuplas
         prev_state_idx = tuple(prev_state_idx)
         current_state_idx = tuple(current_state_idx)
 
-        # --- Passos do Algoritmo Q(λ) ---
+        # Desconto entre s_t e s_{t+k}: γ^k (γ quando a ação dura um único passo)
+        discount = self.gamma if steps == 1 else self.gamma ** steps
 
-        # Calculam-se os valores de V(s_t), V(s_t+1) e Q(s_t, a_t).
+        # Calculam-se os valores de V(s_t) e V(s_t+k) e aplica-se a atualização.
         v_prev = self.get_v_value(prev_state_idx)
         v_current = self.get_v_value(current_state_idx)
-        q_prev = self.get_q_value(prev_state_idx, prev_action_idx)
+        self._apply_update(prev_state_idx, prev_action_idx, reward, v_prev, v_current, discount)
+
+    def _apply_update(self, prev_state_idx, prev_action_idx, reward, v_prev, v_current, discount):
+        """
+        Aplica os passos do Q(λ) com V(s_t) e V(s_t+k) já calculados, sem criar arrays
+        temporários do tamanho da tabela nem concatenar tuplas de índice.
+        """
+        # Visões das linhas de s_t na matriz Q e nos rastros
+        q_row = self.q_matrix[prev_state_idx]
+        trace_row = self.eligibility_traces[prev_state_idx]
+
+        # --- Passos do Algoritmo Q(λ) ---
 
         # e'_t: Erro para o par (s_t, a_t) específico (Passo 1)
-        e_prime_t = reward + self.gamma * v_current - q_prev
+        target = reward + discount * v_current
+        e_prime_t = target - q_row[prev_action_idx]
+        self.last_td_error = e_prime_t
         # e_t: Erro para o estado s_t, usado para os outros pares (Passo 2)
-        e_t = reward + self.gamma * v_current - v_prev
+        e_t = target - v_prev
 
-        # Atualiza-se Q para todos os pares (s,a) usando o erro e_t e decai os rastros
-        
-        # e(s,a) <- γλ * e(s,a)
-        self.eligibility_traces *= self.gamma * self.lambda_  # (Passo 3a) 
+        # Com λ = 0 os rastros são zerados a cada passo e os Passos 3 e 5 não alteram Q
+        if self.lambda_ != 0:
+            # Atualiza-se Q para todos os pares (s,a) usando o erro e_t e decai os rastros
+
+            # e(s,a) <- γλ * e(s,a)  (γ^k λ com ação mantida por k passos)
+            self.eligibility_traces *= discount * self.lambda_  # (Passo 3a)
+
+            # Q(s,a) <- Q(s,a) + α * e_t * e(s,a)
+            np.multiply(self.eligibility_traces, self.alpha * e_t, out=self._scratch)
+            self.q_matrix += self._scratch # (Passo 3b)
 
-        # Q(s,a) <- Q(s,a) + α * e_t * e(s,a)
-        self.q_matrix += self.alpha * e_t * self.eligibility_traces # (Passo 3b)
-        
         # Atualiza Q(s_t, a_t) com o erro específico e'_t
         # Q(s_t, a_t) <- Q(s_t, a_t) + α * e'_t
-        q_update_idx = prev_state_idx + (prev_action_idx,)
-        self.q_matrix[q_update_idx] += self.alpha * e_prime_t # (Passo 4)
+        q_row[prev_action_idx] += self.alpha * e_prime_t # (Passo 4)
+
+        if self.visit_counts is not None:
+            self.visit_counts[prev_state_idx][prev_action_idx] += 1
+
+        if self.lambda_ != 0:
+            # Incrementa o rastro de elegibilidade para o par (s_t, a_t) visitado
+            # e(s_t, a_t) <- e(s_t, a_t) + 1
+            trace_row[prev_action_idx] += 1 # (Passo 5)
+
+    def _act(self, state_idx, epsilon):
+        """
+        Escolhe a ação epsilon-greedy para state_idx e guarda (s, a, V(s)) para o próximo
+        passo fundido. A linha de Q é reduzida uma única vez: o argmax dá a ação gulosa e V(s).
+        """
+        q_row = self.q_matrix[state_idx]
+        greedy = int(q_row.argmax())
+        self._prev_v = q_row[greedy]
+        self._prev_state_idx = state_idx
+        if self.exploration != 'epsilon':
+            self._prev_action = self._count_based_action(state_idx, q_row, greedy, epsilon)
+        elif self._draw_uniform() < epsilon:
+            self._prev_action = self._draw_action()
+        else:
+            self._prev_action = greedy
+        return self._prev_action
+
+    def _count_based_action(self, state_idx, q_row, greedy, epsilon):
+        """
+        Escolhe a ação pelos modos de exploração baseados nas visitas N(s, a).
+        Ambos modulam o epsilon do cronograma de decaimento em vez de substituí-lo.
+        """
+        counts = self.visit_counts[state_idx]
+        n_state = int(counts.sum())
+        if self.exploration == 'ucb':
+            if self._draw_uniform() < epsilon:
+                return self._draw_action()
+            # Q(s,a) + c * sqrt(ln(N(s) + 1) / (N(s,a) + 1)): favorece ações pouco testadas
+            bonus = self.exploration_bonus * np.sqrt(math.log(n_state + 1) / (counts + 1))
+            return int((q_row + bonus).argmax())
+
+        # 'count_epsilon': estados já bem conhecidos exploram menos que o epsilon global
+        state_epsilon = epsilon * min(1.0, self.exploration_bonus / math.sqrt(n_state + 1))
+        return self._draw_action() if self._draw_uniform() < state_epsilon else greedy
+
+    def begin_episode(self, state_idx, epsilon):
+        """
+        Inicia um episódio no modo de passo fundido, escolhendo a primeira ação.
+
+        Args:
+            state_idx (tuple): Índice do estado inicial.
+            epsilon (float): Probabilidade de exploração.
+
+        Returns:
+            int: O índice da ação escolhida.
+        """
+        if self.update_mode == 'episodic':
+            self._ep_len = 0
+            self._ep_states[0] = self._flat_index(state_idx)
+        return self._act(state_idx, epsilon)
+
+    def step(self, state_idx, reward, epsilon, steps=1, done=False):
+        """
+        Passo fundido: aplica a atualização Q(λ) da última ação escolhida e já retorna a
+        próxima ação. Equivale a update() seguido de choose_action(), mas reaproveita V(s_t)
+        calculado na escolha anterior e reduz a linha de s_t+k apenas uma vez antes e uma
+        depois da atualização.
+
+        Args:
+            state_idx (tuple): Índice do estado alcançado (s_t+k).
+            reward (float): Recompensa (descontada) desde a última ação.
+            epsilon (float): Probabilidade de exploração para a próxima ação.
+            steps (int): Número k de passos de simulação desde a última ação.
+            done (bool): Se True, o episódio acabou e nenhuma ação é escolhida.
+
+        Returns:
+            int ou None: O índice da próxima ação (None se done).
+        """
+        discount = self.gamma if steps == 1 else self.gamma ** steps
+        if self.update_mode == 'episodic':
+            return self._buffer_step(state_idx, reward, epsilon, discount, done)
+        v_current = self.q_matrix[state_idx].max()
+        self._apply_update(self._prev_state_idx, self._prev_action, reward, self._prev_v, v_current, discount)
+        if done:
+            return None
+        return self._act(state_idx, epsilon)
+
+    def _flat_index(self, state_idx):
+        """Índice achatado do estado (linha da matriz Q vista como (estados, ações))."""
+        return sum(i * stride for i, stride in zip(state_idx, self._strides))
+
+    def _buffer_step(self, state_idx, reward, epsilon, discount, done):
+        """
+        Passo do modo episódico: apenas guarda a transição nos buffers; a matriz Q só é
+        atualizada em _finish_episode(), quando o episódio acaba.
+        """
+        n = self._ep_len
+        if n == len(self._ep_actions):
+            self._grow_episode_buffers()
+        self._ep_actions[n] = self._prev_action
+        self._ep_rewards[n] = reward
+        self._ep_discounts[n] = discount
+        self._ep_states[n + 1] = self._flat_index(state_idx)
+        self._ep_len = n + 1
+        # Não há erro TD por passo nesta visão
+        self.last_td_error = math.nan
+        if done:
+            self._finish_episode()
+            return None
+        return self._act(state_idx, epsilon)
+
+    def _grow_episode_buffers(self):
+        """Dobra a capacidade dos buffers do episódio (raro: só se o episódio passar da capacidade)."""
+        capacity = 2 * len(self._ep_actions)
+        self._ep_states = np.resize(self._ep_states, capacity + 1)
+        self._ep_actions = np.resize(self._ep_actions, capacity)
+        self._ep_rewards = np.resize(self._ep_rewards, capacity)
+        self._ep_discounts = np.resize(self._ep_discounts, capacity)
+
+    def _finish_episode(self):
+        """
+        Atualização de fim de episódio pela visão para frente do Q(λ) de Peng:
+            G_t = r_t + γ_t [(1 - λ) V(s_t+1) + λ G_t+1],  com G_T = V(s_T)
+        calculada com a matriz Q congelada durante o episódio. Cada par (s, a) recebe a média
+        dos seus erros G_t - Q(s, a) com passo 1 - (1 - α)^n, o mesmo efeito de n atualizações
+        sucessivas com passo α rumo ao mesmo alvo, evitando que pares repetidos muitas vezes
+        no episódio somem n passos cheios e divirjam.
+        """
+        T = self._ep_len
+        if T == 0:
+            return
+        if not self.q_matrix.flags.c_contiguous:
+            self.q_matrix = np.ascontiguousarray(self.q_matrix)
+        q_flat = self.q_matrix.reshape(-1, self.num_actions)
+        states = self._ep_states[:T + 1]
+        actions = self._ep_actions[:T]
+        rewards = self._ep_rewards[:T]
+        discounts = self._ep_discounts[:T]
+
+        # V(s_t+1) de todo o episódio com uma única redução
+        v_next = q_flat[states[1:]].max(axis=1)
+
+        # λ-retornos em uma passada para trás: G_t = b_t + c_t G_t+1
+        if self.lambda_ == 0:
+            returns = rewards + discounts * v_next
+        else:
+            b = (rewards + discounts * (1 - self.lambda_) * v_next).tolist()
+            c = (discounts * self.lambda_).tolist()
+            returns = np.empty(T)
+            g = v_next[T - 1]
+            for t in range(T - 1, -1, -1):
+                g = b[t] + c[t] * g
+                returns[t] = g
+
+        # Erros por par e acumulação por dispersão (np.add.at soma os pares repetidos)
+        pairs = states[:T] * self.num_actions + actions
+        errors = returns - q_flat[states[:T], actions]
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+        error_sum = np.zeros(len(unique_pairs))
+        np.add.at(error_sum, inverse, errors)
+        counts = np.bincount(inverse, minlength=len(unique_pairs))
 
-        # Incrementa o rastro de elegibilidade para o par (s_t, a_t) visitado
-        # e(s_t, a_t) <- e(s_t, a_t) + 1
-        trace_idx = prev_state_idx + (prev_action_idx,)
-        self.eligibility_traces[trace_idx] += 1 # (Passo 5)
+        self.q_matrix.reshape(-1)[unique_pairs] += (1 - (1 - self.alpha) ** counts) * (error_sum / counts)
+        if self.visit_counts is not None:
+            self.visit_counts.reshape(-1)[unique_pairs] += counts.astype(self.visit_counts.dtype)
+        self._ep_len = 0
@@ -0,0 +1,190 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import gymnasium as gym
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Usa backend sem interface gráfica
+import matplotlib.pyplot as plt
+from autotune import default_workers
+from custom_termination_wrapper import CustomTerminationWrapper
+from curriculum import apply_physics
+from grafico import find_file_in_folders
+from agents import load_agent
+
+# Fatores aplicados à gravidade e à força do treino quando a grade não é informada
+DEFAULT_FACTORS = (0.5, 0.75, 1.0, 1.25, 1.5)
+
+# Modelo carregado uma vez por processo trabalhador (preenchido por _init_worker)
+_worker = {}
+
+def _init_worker(q_matrix, params):
+    """Inicializa o agente e o ambiente de cada processo trabalhador."""
+    q_agent = load_agent(q_matrix, params)
+
+    env = gym.make('InvertedPendulum-v5', render_mode=None)
+    env = gym.wrappers.TimeLimit(env, max_episode_steps=params.get('MAX_STEPS', 1000))
+    env = CustomTerminationWrapper(
+        env,
+        angle_limit=params['ANGLE_LIMIT_RADS'],
+        pos_limit=params['POSITION_LIMIT'],
+        vel_limit=params['VELOCITY_LIMIT'],
+        ang_vel_limit=params['ANGULAR_VELOCITY_LIMIT']
+    )
+    _worker.update(agent=q_agent, env=env, params=params)
+
+def evaluate_point(gravity, force_magnitude, num_episodes, seed):
+    """
+    Avalia a política gulosa (epsilon=0) com uma gravidade e uma força.
+    Todos os pontos da grade usam as mesmas seeds de episódio, para que as diferenças
+    venham só da física.
+
+    Returns:
+        np.ndarray: Recompensa total de cada episódio.
+    """
+    q_agent, env, params = _worker['agent'], _worker['env'], _worker['params']
+    action_repeat = params.get('ACTION_REPEAT', 1)
+    adaptive = params.get('ADAPTIVE_ACTION_REPEAT', False)
+    apply_physics(env, gravity)
+
+    rewards = np.zeros(num_episodes)
+    observation, info = env.reset(seed=seed)
+    for episode in range(num_episodes):
+        terminated = truncated = False
+        total_reward = 0.0
+        while not terminated and not truncated:
+            state_idx = q_agent.convert2state(observation)
+            action_idx = q_agent.choose_action(state_idx, epsilon=0)
+            action_force = [-force_magnitude] if action_idx == 0 else [force_magnitude]
+
+            # Mantém a ação como no treino (repetição fixa ou adaptativa)
+            steps = 0
+            while True:
+                observation, reward, terminated, truncated, info = env.step(action_force)
+                total_reward += reward
+                steps += 1
+                if terminated or truncated or steps >= action_repeat:
+                    break
+                if adaptive and q_agent.convert2state(observation) != state_idx:
+                    break
+        rewards[episode] = total_reward
+        observation, info = env.reset()
+    return rewards
+
+def evaluate_grid(q_matrix, params, gravities, forces, num_episodes, success_threshold, workers, seed=42):
+    """
+    Avalia o modelo em todos os pontos da grade gravidade x força, em paralelo.
+
+    Returns:
+        tuple: (recompensa média, taxa de sucesso), matrizes com formato (gravidades, forças).
+    """
+    mean_reward = np.zeros((len(gravities), len(forces)))
+    success_rate = np.zeros_like(mean_reward)
+    points = [(i, j, g, f) for i, g in enumerate(gravities) for j, f in enumerate(forces)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(q_matrix, params)) as pool:
+        futures = [(i, j, pool.submit(evaluate_point, g, f, num_episodes, seed)) for i, j, g, f in points]
+        for i, j, future in futures:
+            rewards = future.result()
+            mean_reward[i, j] = rewards.mean()
+            success_rate[i, j] = np.mean(rewards >= success_threshold)
+    return mean_reward, success_rate
+
+def format_matrix(title, matrix, gravities, forces, fmt):
+    """Monta uma tabela em texto com a gravidade nas linhas e a força nas colunas."""
+    lines = [title, "GRAVITY \\ FORCE " + ''.join(f"{f:>10.3g}" for f in forces)]
+    for g, row in zip(gravities, matrix):
+        lines.append(f"{g:>15.3g} " + ''.join(format(v, fmt).rjust(10) for v in row))
+    return '\n'.join(lines)
+
+def plot_heatmaps(mean_reward, success_rate, gravities, forces, params, base_name, output_dir="graficos"):
+    """Salva os mapas de calor de recompensa média e taxa de sucesso, marcando a física do treino."""
+    os.makedirs(output_dir, exist_ok=True)
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5.5))
+    panels = [
+        (axes[0], mean_reward, 'Recompensa média', '.0f', None),
+        (axes[1], 100 * success_rate, 'Taxa de sucesso (%)', '.0f', (0, 100)),
+    ]
+    for ax, matrix, title, fmt, limits in panels:
+        image = ax.imshow(matrix, origin='lower', aspect='auto', cmap='viridis',
+                          vmin=limits[0] if limits else None, vmax=limits[1] if limits else None)
+        fig.colorbar(image, ax=ax)
+        for i in range(matrix.shape[0]):
+            for j in range(matrix.shape[1]):
+                ax.text(j, i, format(matrix[i, j], fmt), ha='center', va='center', color='white', fontsize=8)
+        # Marca o ponto da física usada no treino, se estiver na grade
+        if params['GRAVITY'] in gravities and params['FORCE_MAGNITUDE'] in forces:
+            ax.add_patch(plt.Rectangle((forces.index(params['FORCE_MAGNITUDE']) - 0.5, gravities.index(params['GRAVITY']) - 0.5),
+                                       1, 1, fill=False, edgecolor='red', linewidth=2))
+        ax.set_xticks(range(len(forces)), [f"{f:.3g}" for f in forces])
+        ax.set_yticks(range(len(gravities)), [f"{g:.3g}" for g in gravities])
+        ax.set_xlabel('FORCE_MAGNITUDE')
+        ax.set_ylabel('GRAVITY')
+        ax.set_title(title)
+    fig.suptitle(f'Robustez - {base_name} (treino: GRAVITY={params["GRAVITY"]}, FORCE_MAGNITUDE={params["FORCE_MAGNITUDE"]})')
+    fig.tight_layout()
+    output_name = os.path.join(output_dir, f"{base_name}_robustez.png")
+    fig.savefig(output_name, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return output_name
+
+def main():
+    parser = argparse.ArgumentParser(description='Avaliação de robustez de um modelo em uma grade de gravidade e força')
+    parser.add_argument('arquivo', help='Arquivo .npy do modelo treinado')
+    parser.add_argument('-g', '--gravity', type=float, nargs='+', default=None,
+                        help='Valores de GRAVITY (padrão: 0.5x a 1.5x o valor do treino)')
+    parser.add_argument('-f', '--force', type=float, nargs='+', default=None,
+                        help='Valores de FORCE_MAGNITUDE (padrão: 0.5x a 1.5x o valor do treino)')
+    parser.add_argument('-e', '--episodes', type=int, default=20, help='Episódios por ponto da grade')
+    parser.add_argument('-t', '--threshold', type=float, default=None,
+                        help='Recompensa mínima de um sucesso (padrão: 90%% de MAX_STEPS)')
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(os.cpu_count()),
+                        help='Processos em paralelo (padrão: perfil da máquina em profiles/, ou o número de núcleos)')
+    parser.add_argument('-s', '--seed', type=int, default=42, help='Seed dos episódios de avaliação')
+
+    args = parser.parse_args()
+
+    file_path = find_file_in_folders(args.arquivo, ['npy', '.'])
+    if not file_path:
+        print(f"Arquivo não encontrado: {args.arquivo}")
+        return
+
+    saved_data = np.load(file_path, allow_pickle=True).item()
+    q_matrix, params = saved_data['q_matrix'], saved_data['params']
+    gravities = args.gravity or [round(params['GRAVITY'] * k, 4) for k in DEFAULT_FACTORS]
+    forces = args.force or [round(params['FORCE_MAGNITUDE'] * k, 4) for k in DEFAULT_FACTORS]
+    threshold = args.threshold if args.threshold is not None else 0.9 * params.get('MAX_STEPS', 1000)
+
+    print(f"Avaliando '{file_path}' em {len(gravities)}x{len(forces)} pontos, {args.episodes} episódios cada...")
+    start_time = time.time()
+    mean_reward, success_rate = evaluate_grid(q_matrix, params, gravities, forces, args.episodes,
+                                              threshold, args.workers, args.seed)
+    elapsed = time.time() - start_time
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    report = '\n'.join([
+        "======================================================================",
+        "               RELATÓRIO DE ROBUSTEZ - PÊNDULO INVERTIDO",
+        "======================================================================",
+        f"Modelo: {file_path}",
+        f"Física do treino: GRAVITY={params['GRAVITY']}, FORCE_MAGNITUDE={params['FORCE_MAGNITUDE']}",
+        f"Episódios por ponto: {args.episodes}, sucesso: recompensa ≥ {threshold:g}",
+        f"Tempo de avaliação: {elapsed:.1f}s",
+        "",
+        format_matrix("--- Recompensa Média ---", mean_reward, gravities, forces, '.1f'),
+        "",
+        format_matrix("--- Taxa de Sucesso ---", success_rate, gravities, forces, '.0%'),
+        "======================================================================",
+    ])
+    print(report)
+
+    os.makedirs("testLog", exist_ok=True)
+    report_path = f"testLog/{base_name}_Robustez.txt"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report + '\n')
+    print(f"Relatório salvo em '{report_path}'.")
+    print(f"Gráfico salvo em: {plot_heatmaps(mean_reward, success_rate, gravities, forces, params, base_name)}")
+
+if __name__ == "__main__":
+    main()
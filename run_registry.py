@@ -0,0 +1,200 @@
+import sqlite3
+import hashlib
+import json
+import os
+import subprocess
+import time
+import argparse
+import numpy as np
+
+# Banco local com o índice de todos os treinos executados
+REGISTRY_FILENAME = "registry.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_hash TEXT NOT NULL,
+    config_name TEXT,
+    config_json TEXT NOT NULL,
+    code_version TEXT,
+    status TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    output_npy TEXT,
+    output_log TEXT,
+    episodes INTEGER,
+    total_steps INTEGER,
+    training_time REAL,
+    final_avg_reward REAL,
+    final_success_rate REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_hash ON runs (config_hash, status);
+"""
+
+def resolve_config(settings, exclude=()):
+    """
+    Extrai os parâmetros (nomes em maiúsculas) já resolvidos de um espaço de nomes, como o
+    globals() de train.py depois de aplicar os valores padrão das chaves opcionais.
+    """
+    return {k: v for k, v in settings.items() if k.isupper() and k not in exclude}
+
+def config_hash(resolved_config):
+    """Calcula o hash SHA-256 da configuração resolvida (independente da ordem das chaves)."""
+    encoded = json.dumps(resolved_config, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def code_version():
+    """Retorna o commit atual do git (com sufixo '-dirty' se houver alterações) ou 'desconhecida'."""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecida'
+
+def artifact_run_id(npy_path):
+    """Id do registro gravado em params['RUN_ID'] de um modelo salvo, ou None."""
+    try:
+        saved_data = np.load(npy_path, allow_pickle=True).item()
+        return saved_data['params'].get('RUN_ID')
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+class RunRegistry():
+    """
+    Registro de treinos em SQLite.
+    Guarda hash da configuração, versão do código, artefatos gerados e métricas finais,
+    permitindo reaproveitar treinos já concluídos e consultar execuções passadas.
+    """
+
+    def __init__(self, filename=REGISTRY_FILENAME):
+        self.filename = filename
+        # Timeout maior permite vários treinos paralelos escrevendo no mesmo registro
+        self.conn = sqlite3.connect(filename, timeout=60)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def find_completed(self, config_hash):
+        """
+        Procura o treino concluído mais recente com este hash cujos artefatos ainda existem
+        e ainda guardam o modelo desse treino. Como o .npy de uma configuração tem nome fixo,
+        qualquer treino posterior (outros parâmetros, ou um novo treino interrompido da mesma
+        configuração) pode tê-lo sobrescrito; por isso o id gravado no arquivo deve ser o do registro.
+
+        Returns:
+            sqlite3.Row ou None: Registro do treino em cache.
+        """
+        rows = self.conn.execute(
+            "SELECT * FROM runs WHERE config_hash = ? AND status = 'completed' ORDER BY finished_at DESC",
+            (config_hash,)
+        ).fetchall()
+        for row in rows:
+            if row['output_npy'] and artifact_run_id(row['output_npy']) == row['id']:
+                return row
+        return None
+
+    def latest(self, config_name):
+        """Retorna o registro mais recente de uma configuração pelo nome, ou None."""
+        return self.conn.execute(
+            "SELECT * FROM runs WHERE config_name = ? ORDER BY id DESC LIMIT 1", (config_name,)
+        ).fetchone()
+
+    def start_run(self, config_hash, config_name, resolved_config, output_npy, output_log):
+        """Registra o início de um treino e retorna o id do registro."""
+        cursor = self.conn.execute(
+            "INSERT INTO runs (config_hash, config_name, config_json, code_version, status, "
+            "started_at, output_npy, output_log) VALUES (?, ?, ?, ?, 'running', ?, ?, ?)",
+            (config_hash, config_name, json.dumps(resolved_config, sort_keys=True, default=repr),
+             code_version(), time.time(), output_npy, output_log)
+        )
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, status, episodes, total_steps, training_time,
+                   final_avg_reward=None, final_success_rate=None):
+        """Registra o fim de um treino ('completed', 'interrupted' ou 'failed') e suas métricas."""
+        self.conn.execute(
+            "UPDATE runs SET status = ?, finished_at = ?, episodes = ?, total_steps = ?, "
+            "training_time = ?, final_avg_reward = ?, final_success_rate = ? WHERE id = ?",
+            (status, time.time(), episodes, total_steps, training_time,
+             final_avg_reward, final_success_rate, run_id)
+        )
+        self.conn.commit()
+
+    def query(self, filters=None, order_by='final_success_rate', limit=10, status='completed'):
+        """
+        Consulta treinos filtrando por parâmetros da configuração.
+
+        Args:
+            filters (dict): Parâmetros exigidos, ex.: {'LAMBDA': 0.8}.
+            order_by (str): Coluna de métrica usada para ordenar (decrescente).
+            limit (int): Número máximo de registros.
+            status (str): Status dos treinos considerados (None para todos).
+
+        Returns:
+            list: Registros (sqlite3.Row) ordenados do melhor para o pior.
+        """
+        allowed = ('final_success_rate', 'final_avg_reward', 'episodes', 'total_steps', 'training_time', 'finished_at')
+        if order_by not in allowed:
+            raise ValueError(f"Métrica inválida: {order_by}. Use uma de {allowed}.")
+
+        sql = "SELECT * FROM runs WHERE 1 = 1"
+        args = []
+        if status:
+            sql += " AND status = ?"
+            args.append(status)
+        for key, value in (filters or {}).items():
+            sql += " AND json_extract(config_json, ?) = ?"
+            args.extend([f'$.{key}', value])
+        sql += f" ORDER BY {order_by} DESC LIMIT ?"
+        args.append(limit)
+        return self.conn.execute(sql, args).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def parse_filter(text):
+    """Converte 'CHAVE=valor' em (chave, valor), interpretando números quando possível."""
+    key, _, raw = text.partition('=')
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    return key.strip(), value
+
+def main():
+    parser = argparse.ArgumentParser(description='Consulta o registro de treinos')
+    parser.add_argument('-w', '--where', action='append', default=[],
+                        help='Filtro por parâmetro, ex.: --where LAMBDA=0.8 (pode repetir)')
+    parser.add_argument('-m', '--metric', default='final_success_rate', help='Métrica de ordenação')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='Número de registros')
+    parser.add_argument('-a', '--all', action='store_true', help='Inclui treinos não concluídos')
+    parser.add_argument('--db', default=REGISTRY_FILENAME, help='Arquivo do registro')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Registro não encontrado: {args.db}")
+        return
+
+    registry = RunRegistry(args.db)
+    filters = dict(parse_filter(w) for w in args.where)
+    rows = registry.query(filters, args.metric, args.limit, status=None if args.all else 'completed')
+    registry.close()
+
+    if not rows:
+        print("Nenhum treino encontrado.")
+        return
+
+    for row in rows:
+        success = f"{row['final_success_rate']:.2%}" if row['final_success_rate'] is not None else 'N/A'
+        reward = f"{row['final_avg_reward']:.2f}" if row['final_avg_reward'] is not None else 'N/A'
+        print(f"#{row['id']:<4} {row['config_name'] or '?':<20} {row['status']:<11} "
+              f"Sucesso: {success:>8}  Recompensa: {reward:>8}  Episódios: {row['episodes']}  "
+              f"Hash: {row['config_hash'][:12]}  Código: {(row['code_version'] or '')[:12]}  -> {row['output_npy']}")
+
+if __name__ == "__main__":
+    main()
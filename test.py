@@ -4,7 +4,9 @@ import sys
 import os
 import numpy as np
 from custom_termination_wrapper import CustomTerminationWrapper
-from q_lambda import QLambdaCausal
+from agents import load_agent
+from dataset import TransitionRecorder
+from video_recorder import VideoRecorder
 
 # --- Parâmetros de Entrada e Saída ---
 # Especifique o arquivo .npy do modelo treinado que você quer testar.
@@ -18,7 +20,13 @@ TEST_LOG_FILENAME = f"testLog/{FILENAME_BASE}_TestLog.txt"
 # --- Parâmetros de Teste ---
 NUM_TEST_EPISODES = 20 # Número de episódios para rodar o teste
 FPS = 10000 # Para visualização
-RENDER_MODE = 'human' # Use 'human' para ver o agente ou 'rgb_array' para rodar sem visualização.
+RENDER_MODE = 'human' # Use 'human' para ver o agente ou None para rodar sem visualização.
+# Episódios gravados em vídeo (ex.: [0, NUM_TEST_EPISODES - 1]). Com a lista não vazia, o ambiente usa
+# 'rgb_array' no lugar de RENDER_MODE e os quadros são codificados em outro processo, sem pausas.
+VIDEO_EPISODES = []
+VIDEO_DIR = "videos"
+VIDEO_FPS = 25 # Tempo real do InvertedPendulum-v5 (dt = 0.04 s)
+RECORD_DATASET = False # Grava as transições em datasets/ para treino offline (offline_solver.py)
 
 # --- Carregamento do Modelo e Parâmetros ---
 try:
@@ -44,22 +52,20 @@ POSITION_LIMIT = params['POSITION_LIMIT']
 ANGLE_LIMIT_RADS = params['ANGLE_LIMIT_RADS']
 VELOCITY_LIMIT = params['VELOCITY_LIMIT']
 ANGULAR_VELOCITY_LIMIT = params['ANGULAR_VELOCITY_LIMIT']
+# Repetição de ação usada no treino (modelos antigos decidem a cada passo)
+ACTION_REPEAT = params.get('ACTION_REPEAT', 1)
+ADAPTIVE_ACTION_REPEAT = params.get('ADAPTIVE_ACTION_REPEAT', False)
 STATE_DIMS = (params['N_POSITION'], params['N_ANGLE'], params['N_VELOCITY'], params['N_ANGULAR_VELOCITY'])
 
 # --- Instanciação do Agente de IA ---
-q_agent = QLambdaCausal(
-    dims=STATE_DIMS,
-    alpha=0, lambda_=0, gamma=0, # Hiperparâmetros não são usados no teste
-    pos_limit=params['POSITION_LIMIT'],
-    angle_limit=params['ANGLE_LIMIT_RADS'],
-    vel_limit=params['VELOCITY_LIMIT'],
-    ang_vel_limit=params['ANGULAR_VELOCITY_LIMIT'],
-    num_actions=2 
-)
-q_agent.q_matrix = q_matrix
+# Grade única ou tile coding, conforme o AGENT salvo no modelo
+q_agent = load_agent(q_matrix, params)
+
+# Gravador de vídeo criado antes do ambiente, para o processo codificador não herdar o contexto gráfico
+video = VideoRecorder(VIDEO_DIR, fps=VIDEO_FPS) if VIDEO_EPISODES else None
 
 # 1. Crie o ambiente.
-env = gym.make('InvertedPendulum-v5', render_mode=RENDER_MODE)
+env = gym.make('InvertedPendulum-v5', render_mode='rgb_array' if video else RENDER_MODE)
 
 # Modifica a gravidade e as condições de término para corresponder ao treino.
 env.unwrapped.model.opt.gravity[2] = -GRAVITY
@@ -71,6 +77,10 @@ env = CustomTerminationWrapper(
     ang_vel_limit=ANGULAR_VELOCITY_LIMIT
 )
 
+# Gravador de transições do teste, com os mesmos parâmetros do modelo
+recorder = TransitionRecorder(f"{FILENAME_BASE}_teste", STATE_DIMS, q_agent.num_actions, params=params) if RECORD_DATASET and params.get('AGENT', 'grid') == 'grid' else None
+GAMMA = params.get('GAMMA', 0.97)
+
 total_rewards_list = []
 
 with open(TEST_LOG_FILENAME, 'w', encoding='utf-8') as log_file:
@@ -92,6 +102,10 @@ Número de Episódios de Teste: {NUM_TEST_EPISODES}
             terminated = False
             truncated = False
             total_reward = 0
+            recording = video is not None and episode in VIDEO_EPISODES
+            if recording:
+                video.start_episode(f"{FILENAME_BASE}_ep{episode + 1:03d}")
+                video.add_frame(env.render())
 
             while not terminated and not truncated:
                 # 1. Converte a observação para o estado discreto
@@ -103,13 +117,32 @@ Número de Episódios de Teste: {NUM_TEST_EPISODES}
                 # Mapeia o índice da ação para a força
                 action_force = [-FORCE_MAGNITUDE] if action_idx == 0 else [FORCE_MAGNITUDE]
                 
-                # 3. Executa a ação no ambiente
-                observation, reward, terminated, truncated, info = env.step(action_force)
-                total_reward += reward
-                
-                # Pausa para visualização
-                time.sleep(1 / FPS)
+                # 3. Executa a ação no ambiente, mantendo-a como no treino
+                steps = 0
+                decision_reward = 0.0
+                while True:
+                    observation, reward, terminated, truncated, info = env.step(action_force)
+                    total_reward += reward
+                    decision_reward += GAMMA ** steps * reward
+                    steps += 1
+                    
+                    if recording:
+                        video.add_frame(env.render())
+                    elif env.render_mode == 'human':
+                        # Pausa para visualização
+                        time.sleep(1 / FPS)
+
+                    if terminated or truncated or steps >= ACTION_REPEAT:
+                        break
+                    if ADAPTIVE_ACTION_REPEAT and q_agent.convert2state(observation) != state_idx:
+                        break
+
+                if recorder:
+                    recorder.append(state_idx, action_idx, decision_reward, q_agent.convert2state(observation), terminated, steps)
             
+            if recording:
+                video.end_episode()
+
             total_rewards_list.append(total_reward)
             log_message = f"Episodio de Teste: {episode + 1}/{NUM_TEST_EPISODES}, Recompensa Total: {total_reward:.2f}"
             print(log_message)
@@ -120,6 +153,12 @@ Número de Episódios de Teste: {NUM_TEST_EPISODES}
 
     finally:
         env.close()
+        if video:
+            print("Aguardando a codificação dos vídeos...")
+            video.close()
+        if recorder:
+            recorder.close()
+            print(f"{recorder.total} transições gravadas em '{recorder.path}'.")
         
         # Calcula e salva a média das recompensas
         if total_rewards_list:
@@ -0,0 +1,187 @@
+import numpy as np
+from q_lambda import QLambdaCausal
+
+class QLambdaTiles():
+    """
+    Q(λ) de Peng e Williams com tile coding.
+    Mantém `num_tilings` grades sobre os mesmos limites físicos, cada uma deslocada por uma
+    fração da largura do tile. Uma observação ativa um tile por grade e Q(s, a) é a soma dos
+    pesos dos tiles ativos, o que dá resolução efetiva de `num_tilings` vezes a de cada grade
+    com generalização entre estados vizinhos. Oferece a mesma interface de QLambdaCausal
+    (convert2state, choose_action, update, begin_episode, step); o "estado" é a tupla dos
+    índices dos tiles ativos.
+
+    Os rastros de elegibilidade são esparsos: um buffer circular guarda, para as últimas
+    decisões, os índices dos pesos (tiles ativos, ação) e o valor do rastro, que é o mesmo
+    para todos os tiles de uma decisão. Um rastro é descartado quando (γλ)^n fica abaixo de
+    `trace_tolerance`, então cada atualização toca apenas alguns pesos por decisão recente.
+    """
+
+    def __init__(self, dims, num_tilings, num_actions, alpha, lambda_, gamma,
+                 pos_limit, angle_limit, vel_limit, ang_vel_limit,
+                 seed=None, rng_block_size=4096, track_visits=False,
+                 exploration='epsilon', exploration_bonus=1.0,
+                 update_mode='online', episode_capacity=1024, trace_tolerance=1e-3):
+
+        if exploration != 'epsilon':
+            raise ValueError(f"Modo de exploração '{exploration}' não suportado com tile coding. Use 'epsilon'.")
+        if update_mode != 'online':
+            raise ValueError(f"Modo de atualização '{update_mode}' não suportado com tile coding. Use 'online'.")
+
+        # Cada tile ativo recebe uma fração do passo, para que Q mude α vezes o erro
+        self.alpha = alpha
+        self.step_size = alpha / num_tilings
+        self.lambda_ = lambda_
+        self.gamma = gamma
+
+        self.state_dims = tuple(dims)       # Tiles por dimensão em cada grade
+        self.num_tilings = num_tilings
+        self.num_actions = num_actions
+        # Um tile extra por dimensão cobre o deslocamento das grades
+        self.q_dims = (num_tilings,) + tuple(d + 1 for d in self.state_dims) + (num_actions,)
+
+        self.pos_limit = pos_limit
+        self.angle_limit = angle_limit
+        self.vel_limit = vel_limit
+        self.ang_vel_limit = ang_vel_limit
+        limits = np.array([pos_limit, angle_limit, vel_limit, ang_vel_limit], dtype=np.float64)
+        self._limits = limits
+        # Converte a observação em coordenadas contínuas na unidade de tiles de cada dimensão
+        self._scale = np.array(self.state_dims, dtype=np.float64) / (2 * limits)
+        # Deslocamento da grade k na dimensão d: k(2d + 1)/T (em tiles), evitando grades alinhadas na diagonal
+        displacement = 2 * np.arange(len(self.state_dims)) + 1
+        self._offsets = (np.arange(num_tilings)[:, None] * displacement[None, :] / num_tilings) % 1.0
+        self._max_coord = np.array(self.state_dims)
+        # Passos para achatar (grade, i0, i1, i2, i3) em um índice de linha da matriz de pesos
+        tiles_per_tiling = int(np.prod(self.q_dims[1:-1]))
+        self._strides = np.array([int(np.prod(self.q_dims[2 + i:-1])) for i in range(len(self.state_dims))])
+        self._tiling_base = np.arange(num_tilings) * tiles_per_tiling
+
+        self.rng = np.random.default_rng(seed)
+        self.rng_block_size = rng_block_size
+        self._uniform_block, self._uniform_pos = [], 0
+        self._action_block, self._action_pos = [], 0
+
+        # Pesos dos tiles (guardados em q_matrix, o mesmo nome salvo no .npy por train.py),
+        # inicializados de forma que a soma sobre as grades fique em [-1, 1] como em QLambdaCausal
+        self.q_matrix = self.rng.uniform(-1, 1, size=self.q_dims) / num_tilings
+
+        # Rastros esparsos: capacidade para as decisões com (γλ)^n ≥ trace_tolerance
+        self.trace_tolerance = trace_tolerance
+        decay = gamma * lambda_
+        if decay <= 0:
+            trace_capacity = 1
+        elif decay >= 1:
+            trace_capacity = episode_capacity
+        else:
+            trace_capacity = int(np.clip(np.ceil(np.log(trace_tolerance) / np.log(decay)) + 1, 1, episode_capacity))
+        self.trace_capacity = trace_capacity
+        self._trace_idx = np.zeros((trace_capacity, num_tilings), dtype=np.int64)  # Índices em q_matrix achatada
+        self._trace_values = np.zeros(trace_capacity)  # Zero nas posições livres ou expiradas
+        self._trace_pos = 0
+
+        self.exploration = exploration
+        self.exploration_bonus = exploration_bonus
+        self.update_mode = update_mode
+        self.visit_counts = np.zeros(self.q_dims, dtype=np.int32) if track_visits else None
+        self.last_td_error = 0.0
+
+    @property
+    def q_matrix(self):
+        return self._q_matrix
+
+    @q_matrix.setter
+    def q_matrix(self, value):
+        # Ao substituir os pesos (teste, warm start), a visão (tiles, ações) acompanha
+        self._q_matrix = np.ascontiguousarray(value, dtype=np.float64)
+        self._weights = self._q_matrix.reshape(-1, self.num_actions)
+        self._flat_weights = self._q_matrix.reshape(-1)
+
+    # Sorteios em bloco da exploração, iguais aos de QLambdaCausal
+    _draw_uniform = QLambdaCausal._draw_uniform
+    _draw_action = QLambdaCausal._draw_action
+
+    def convert2state(self, observation):
+        """Índices (achatados) do tile ativo em cada grade, calculados de uma só vez."""
+        x = (np.asarray(observation[:4], dtype=np.float64) + self._limits) * self._scale
+        coords = (x + self._offsets).astype(np.int64)
+        np.clip(coords, 0, self._max_coord, out=coords)
+        return tuple((self._tiling_base + coords @ self._strides).tolist())
+
+    def q_values(self, state_idx):
+        """Q(s, ·): soma dos pesos dos tiles ativos, para todas as ações."""
+        return self._weights[list(state_idx)].sum(axis=0)
+
+    def get_q_value(self, state_idx, action_idx):
+        return self.q_values(state_idx)[action_idx]
+
+    def get_v_value(self, state_idx):
+        return self.q_values(state_idx).max()
+
+    def choose_action(self, state_idx, epsilon):
+        """Escolhe uma ação epsilon-greedy sobre a soma dos tiles ativos."""
+        if self._draw_uniform() < epsilon:
+            return self._draw_action()
+        return int(self.q_values(state_idx).argmax())
+
+    def update(self, prev_state_idx, prev_action_idx, reward, current_state_idx, steps=1):
+        """Atualização Q(λ) com os tiles ativos de s_t e s_t+k (ver QLambdaCausal.update)."""
+        discount = self.gamma if steps == 1 else self.gamma ** steps
+        self._apply_update(prev_state_idx, prev_action_idx, reward,
+                           self.get_v_value(prev_state_idx), self.get_v_value(current_state_idx), discount)
+
+    def _apply_update(self, prev_state_idx, prev_action_idx, reward, v_prev, v_current, discount):
+        """
+        Passos do Q(λ) de Peng sobre os pesos: os rastros das decisões recentes decaem e
+        recebem o erro e_t, e o par (tiles ativos, a_t) recebe o erro específico e entra no
+        buffer de rastros. Só os pesos com rastro vivo são tocados.
+        """
+        active = list(prev_state_idx)
+        target = reward + discount * v_current
+        e_prime_t = target - self._weights[active, prev_action_idx].sum()
+        self.last_td_error = e_prime_t
+        e_t = target - v_prev
+
+        if self.lambda_ != 0:
+            values = self._trace_values
+            values *= discount * self.lambda_
+            values[values < self.trace_tolerance] = 0.0
+            # Um mesmo peso pode aparecer em várias decisões: np.add.at acumula as repetições
+            np.add.at(self._flat_weights, self._trace_idx, (self.step_size * e_t) * values[:, None])
+
+        # Cada grade contribui com um tile distinto, então a indexação não repete posições
+        self._weights[active, prev_action_idx] += self.step_size * e_prime_t
+
+        if self.visit_counts is not None:
+            self.visit_counts.reshape(-1, self.num_actions)[active, prev_action_idx] += 1
+
+        if self.lambda_ != 0:
+            # A decisão atual ocupa a posição da mais antiga (já expirada se a capacidade basta)
+            pos = self._trace_pos
+            self._trace_idx[pos] = np.asarray(active) * self.num_actions + prev_action_idx
+            self._trace_values[pos] = 1.0
+            self._trace_pos = (pos + 1) % self.trace_capacity
+
+    def _act(self, state_idx, epsilon):
+        q_row = self.q_values(state_idx)
+        greedy = int(q_row.argmax())
+        self._prev_v = q_row[greedy]
+        self._prev_state_idx = state_idx
+        if self._draw_uniform() < epsilon:
+            self._prev_action = self._draw_action()
+        else:
+            self._prev_action = greedy
+        return self._prev_action
+
+    def begin_episode(self, state_idx, epsilon):
+        """Inicia um episódio no modo de passo fundido (ver QLambdaCausal.begin_episode)."""
+        return self._act(state_idx, epsilon)
+
+    def step(self, state_idx, reward, epsilon, steps=1, done=False):
+        """Passo fundido: atualiza com a última ação e retorna a próxima (ver QLambdaCausal.step)."""
+        discount = self.gamma if steps == 1 else self.gamma ** steps
+        v_current = self.q_values(state_idx).max()
+        self._apply_update(self._prev_state_idx, self._prev_action, reward, self._prev_v, v_current, discount)
+        if done:
+            return None
+        return self._act(state_idx, epsilon)
@@ -1,15 +1,36 @@
+# Perfil de desempenho da máquina (autotune.py): as threads de BLAS são definidas antes de importar o NumPy
+from autotune import load_host_profile, apply_blas_threads
+HOST_PROFILE = load_host_profile()
+apply_blas_threads(HOST_PROFILE)
 import gymnasium as gym
 import time
 import os
+import sys
 import importlib
+import argparse
 import numpy as np
 from custom_termination_wrapper import CustomTerminationWrapper
-from q_lambda import QLambdaCausal
+from agents import make_agent, AGENT_TYPES
+from curriculum import PhysicsCurriculum, apply_physics, load_warm_start
 import grafico
+from convergence import ConvergenceMonitor, SuccessRateCriterion, PlateauCriterion, SequentialSuccessTest
+from dataset import TransitionRecorder
+from metrics_server import TrainingMetrics, start_metrics_server
+from run_registry import RunRegistry, resolve_config, config_hash
+from federated import FederatedExchange, worker_seed
+from flight_recorder import FlightRecorder, violated_limits
 
 # --- SELEÇÃO DE CONFIGURAÇÃO ---
-# Para mudar o experimento, altere o nome do arquivo na string abaixo.
-CONFIG_NAME = "Qepsilon01"
+# Para mudar o experimento, altere o nome do arquivo na string abaixo
+# ou passe o nome do módulo na linha de comando (ex.: python train.py Qlambda1).
+parser = argparse.ArgumentParser(description='Treina o agente Q(λ) no pêndulo invertido')
+parser.add_argument('config', nargs='?', default="Qepsilon01", help='Módulo de configuração em configs/')
+parser.add_argument('--federated-dir', help='Pasta compartilhada para o treino federado (ver federated.py)')
+parser.add_argument('--worker-id', type=int, default=0, help='Id deste trabalhador no treino federado')
+args = parser.parse_args()
+CONFIG_NAME = args.config
+# Se True, treina novamente mesmo que esta configuração já tenha um treino concluído no registro.
+FORCE_RETRAIN = False
 
 # Carrega dinamicamente o módulo de configuração especificado
 config = importlib.import_module(f'configs.{CONFIG_NAME}')
@@ -41,12 +62,83 @@ NUM_EPISODES = config.NUM_EPISODES
 MAX_STEPS = config.MAX_STEPS
 EARLY_STOP_THRESHOLD, EARLY_STOP_WINDOW, EARLY_STOP_SUCCESS_RATE = config.EARLY_STOP_THRESHOLD, config.EARLY_STOP_WINDOW, config.EARLY_STOP_SUCCESS_RATE
 MIN_EPISODES, PLATEAU_WINDOW, PLATEAU_TOLERANCE = config.MIN_EPISODES, config.PLATEAU_WINDOW, config.PLATEAU_TOLERANCE
+# Parâmetros opcionais de currículo físico e warm start (ausentes nas configs antigas)
+CURRICULUM = getattr(config, 'CURRICULUM', None)
+WARM_START_FILENAME = getattr(config, 'WARM_START_FILENAME', None)
+# Parâmetros opcionais de repetição de ação (frame-skip)
+ACTION_REPEAT = getattr(config, 'ACTION_REPEAT', 1)
+ADAPTIVE_ACTION_REPEAT = getattr(config, 'ADAPTIVE_ACTION_REPEAT', False)
+# Gravação opcional das transições para treino offline (offline_solver.py)
+RECORD_DATASET = getattr(config, 'RECORD_DATASET', False)
+# Contagem de visitas por par (estado, ação), salva junto ao modelo (coverage_report.py)
+TRACK_VISITS = getattr(config, 'TRACK_VISITS', False)
+# Exploração por contagem de visitas: 'epsilon' (padrão), 'ucb' ou 'count_epsilon'
+EXPLORATION = getattr(config, 'EXPLORATION', 'epsilon')
+EXPLORATION_BONUS = getattr(config, 'EXPLORATION_BONUS', 1.0)
+# Representação de valor: 'grid' (grade única, padrão) ou 'tiles' (N_TILINGS grades deslocadas,
+# cada uma com N_POSITION x N_ANGLE x N_VELOCITY x N_ANGULAR_VELOCITY tiles)
+AGENT = getattr(config, 'AGENT', 'grid')
+N_TILINGS = getattr(config, 'N_TILINGS', 8)
+# Tile coding: rastros abaixo desta tolerância são descartados (rastros esparsos)
+TRACE_TOLERANCE = getattr(config, 'TRACE_TOLERANCE', 1e-3)
+if AGENT not in AGENT_TYPES:
+    raise ValueError(f"Agente inválido: {AGENT}. Use um de {AGENT_TYPES}.")
+if AGENT == 'tiles' and RECORD_DATASET:
+    # Os conjuntos gravados (e offline_solver.py) supõem a grade única
+    print("Aviso: RECORD_DATASET não é suportado com AGENT = 'tiles'; a gravação foi desativada.")
+    RECORD_DATASET = False
+# Atualização: 'online' (rastros a cada passo) ou 'episodic' (λ-retornos ao fim do episódio)
+UPDATE_MODE = getattr(config, 'UPDATE_MODE', 'online')
+# Treino federado: intervalo (em episódios) entre as trocas de matriz Q pela pasta compartilhada
+FEDERATED_DIR = args.federated_dir
+FEDERATED_SYNC_EPISODES = getattr(config, 'FEDERATED_SYNC_EPISODES', 50)
+if FEDERATED_DIR:
+    # Cada trabalhador tem seed e arquivos próprios; as visitas ponderam a média das matrizes
+    MASTER_SEED = worker_seed(MASTER_SEED, args.worker_id)
+    FILENAME_BASE = f"{FILENAME_BASE}_w{args.worker_id:03d}"
+    OUTPUT_FILENAME = f"npy/{FILENAME_BASE}.npy"
+    LOG_FILENAME = f"trainLog/{FILENAME_BASE}.txt"
+    TRACK_VISITS = True
+# Registrador de voo: salva em flight/ os episódios que falham (ou ficam abaixo do limiar de recompensa)
+# a partir de FLIGHT_RECORDER_START_EPISODE, mantendo os FLIGHT_RECORDER_MAX_DUMPS mais recentes
+FLIGHT_RECORDER = getattr(config, 'FLIGHT_RECORDER', False)
+FLIGHT_RECORDER_CAPACITY = getattr(config, 'FLIGHT_RECORDER_CAPACITY', MAX_STEPS)
+FLIGHT_RECORDER_START_EPISODE = getattr(config, 'FLIGHT_RECORDER_START_EPISODE', MIN_EPISODES)
+FLIGHT_RECORDER_REWARD_THRESHOLD = getattr(config, 'FLIGHT_RECORDER_REWARD_THRESHOLD', None)
+FLIGHT_RECORDER_MAX_DUMPS = getattr(config, 'FLIGHT_RECORDER_MAX_DUMPS', 100)
+# Porta local do endpoint de métricas no formato Prometheus (None desabilita)
+METRICS_PORT = getattr(config, 'METRICS_PORT', None)
+# Parâmetros opcionais do teste sequencial (SPRT) de convergência
+SEQUENTIAL_TEST = getattr(config, 'SEQUENTIAL_TEST', False)
+SPRT_MARGIN = getattr(config, 'SPRT_MARGIN', 0.08)
+SPRT_ALPHA = getattr(config, 'SPRT_ALPHA', 0.05)
+SPRT_BETA = getattr(config, 'SPRT_BETA', 0.05)
+
+# --- Registro de Treinos ---
+# Uma configuração idêntica a um treino já concluído reaproveita os artefatos em vez de treinar de novo.
+# O hash cobre os valores finais acima, incluindo os padrões das chaves ausentes no módulo de configuração.
+RESOLVED_CONFIG = resolve_config(globals(), exclude=('CONFIG_NAME', 'FORCE_RETRAIN', 'HOST_PROFILE', 'AGENT_TYPES'))
+if FEDERATED_DIR:
+    RESOLVED_CONFIG.update({'FEDERATED_DIR': os.path.abspath(FEDERATED_DIR), 'FEDERATED_WORKER_ID': args.worker_id})
+CONFIG_HASH = config_hash(RESOLVED_CONFIG)
+registry = RunRegistry()
+cached_run = registry.find_completed(CONFIG_HASH)
+if cached_run and not FORCE_RETRAIN:
+    print(f"Configuração '{CONFIG_NAME}' já treinada (registro #{cached_run['id']}, hash {CONFIG_HASH[:12]}).")
+    print(f"Modelo: '{cached_run['output_npy']}', Log: '{cached_run['output_log']}'. "
+          f"Taxa de Sucesso Final: {cached_run['final_success_rate'] or 0:.2%}")
+    print("Use FORCE_RETRAIN = True para treinar novamente.")
+    registry.close()
+    sys.exit()
 
 np.random.seed(MASTER_SEED)  # Aplica a seed do NumPy
 STATE_DIMS = (N_POSITION, N_ANGLE, N_VELOCITY, N_ANGULAR_VELOCITY)
 
 # --- Instanciação do Agente de IA ---
-q_agent = QLambdaCausal(
+q_agent = make_agent(
+    AGENT,
+    num_tilings=N_TILINGS,
+    trace_tolerance=TRACE_TOLERANCE,
     dims=STATE_DIMS,
     alpha=ALPHA,
     lambda_=LAMBDA,
@@ -55,9 +147,26 @@ q_agent = QLambdaCausal(
     angle_limit=ANGLE_LIMIT_RADS,
     vel_limit=VELOCITY_LIMIT,
     ang_vel_limit=ANGULAR_VELOCITY_LIMIT,
-    num_actions=2 # Duas ações: esquerda e direita
+    num_actions=2, # Duas ações: esquerda e direita
+    seed=MASTER_SEED, # Gerador próprio do agente para exploração e inicialização da matriz Q
+    track_visits=TRACK_VISITS,
+    exploration=EXPLORATION,
+    exploration_bonus=EXPLORATION_BONUS,
+    update_mode=UPDATE_MODE,
+    episode_capacity=MAX_STEPS
 )
 
+# Warm start: inicializa a matriz Q a partir de um modelo treinado com outra física
+if WARM_START_FILENAME:
+    q_agent.q_matrix, warm_start_params = load_warm_start(WARM_START_FILENAME, q_agent.q_dims)
+    print(f"Warm start a partir de '{WARM_START_FILENAME}' "
+          f"(GRAVITY={warm_start_params.get('GRAVITY')}, FORCE_MAGNITUDE={warm_start_params.get('FORCE_MAGNITUDE')})")
+
+# Currículo: a física inicial vem do primeiro estágio em vez de GRAVITY/FORCE_MAGNITUDE
+curriculum = PhysicsCurriculum(CURRICULUM) if CURRICULUM else None
+gravity = curriculum.current['GRAVITY'] if curriculum else GRAVITY
+force_magnitude = curriculum.current['FORCE_MAGNITUDE'] if curriculum else FORCE_MAGNITUDE
+
 # Crie o ambiente. Use 'human' para ver o agente ou 'rgb_array' para treinar mais rápido.
 env = gym.make('InvertedPendulum-v5', render_mode=None)
 
@@ -66,7 +175,25 @@ env = gym.wrappers.TimeLimit(env, max_episode_steps=MAX_STEPS)
 
 # Modifica a gravidade diretamente no modelo da simulação após a criação.
 # A gravidade atua no eixo Z (índice 2) e deve ser negativa para puxar para baixo.
-env.unwrapped.model.opt.gravity[2] = -GRAVITY
+apply_physics(env, gravity)
+
+# Gravador de transições (s, a, r, s', done) em disco, se habilitado
+recorder = TransitionRecorder(
+    FILENAME_BASE, STATE_DIMS, q_agent.num_actions,
+    params={
+        'GRAVITY': gravity, 'FORCE_MAGNITUDE': force_magnitude,
+        'POSITION_LIMIT': POSITION_LIMIT, 'ANGLE_LIMIT_RADS': ANGLE_LIMIT_RADS,
+        'VELOCITY_LIMIT': VELOCITY_LIMIT, 'ANGULAR_VELOCITY_LIMIT': ANGULAR_VELOCITY_LIMIT,
+        'N_POSITION': N_POSITION, 'N_ANGLE': N_ANGLE, 'N_VELOCITY': N_VELOCITY, 'N_ANGULAR_VELOCITY': N_ANGULAR_VELOCITY,
+        'GAMMA': GAMMA, 'MAX_STEPS': MAX_STEPS, 'ACTION_REPEAT': ACTION_REPEAT, 'ADAPTIVE_ACTION_REPEAT': ADAPTIVE_ACTION_REPEAT,
+    }
+) if RECORD_DATASET else None
+
+# Registrador de voo: buffer circular pré-alocado, reescrito a cada episódio
+flight = FlightRecorder(FILENAME_BASE, FLIGHT_RECORDER_CAPACITY, state_ndim=N_TILINGS if AGENT == 'tiles' else len(STATE_DIMS),
+                        max_dumps=FLIGHT_RECORDER_MAX_DUMPS) if FLIGHT_RECORDER else None
+LIMITS = (POSITION_LIMIT, ANGLE_LIMIT_RADS, VELOCITY_LIMIT, ANGULAR_VELOCITY_LIMIT)
+
 env = CustomTerminationWrapper(
     env, 
     angle_limit=ANGLE_LIMIT_RADS, 
@@ -87,6 +214,35 @@ for path in [OUTPUT_FILENAME, LOG_FILENAME]:
     if dir_name and not os.path.exists(dir_name):
         os.makedirs(dir_name)
 
+# Critérios de parada antecipada avaliados pelo monitor de convergência
+criteria = [
+    SuccessRateCriterion(MIN_EPISODES, EARLY_STOP_SUCCESS_RATE),
+    PlateauCriterion(PLATEAU_WINDOW, PLATEAU_TOLERANCE, EARLY_STOP_THRESHOLD * 0.9),
+]
+if SEQUENTIAL_TEST:
+    criteria.append(SequentialSuccessTest(
+        MIN_EPISODES, p1=EARLY_STOP_SUCCESS_RATE, p0=EARLY_STOP_SUCCESS_RATE - SPRT_MARGIN,
+        alpha=SPRT_ALPHA, beta=SPRT_BETA
+    ))
+monitor = ConvergenceMonitor(EARLY_STOP_THRESHOLD, EARLY_STOP_WINDOW, criteria)
+exchange = FederatedExchange(FEDERATED_DIR, args.worker_id) if FEDERATED_DIR else None
+
+# Endpoint de métricas em segundo plano, alimentado pelos contadores do laço de treino.
+# Sobe antes do registro do treino: uma porta ocupada encerra o script sem deixar um registro 'running'.
+metrics = TrainingMetrics(CONFIG_NAME) if METRICS_PORT is not None else None
+if metrics:
+    metrics_server = start_metrics_server(metrics, METRICS_PORT)
+    print(f"Métricas em http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
+run_id = registry.start_run(CONFIG_HASH, CONFIG_NAME, RESOLVED_CONFIG, OUTPUT_FILENAME, LOG_FILENAME)
+training_status = 'failed'
+
+# Inicializar tempo de treinamento e contadores (usados também pelo bloco finally)
+start_time = time.time()
+update_time = 0.0
+total_steps = 0
+episode = -1
+
 with open(LOG_FILENAME, 'w', encoding='utf-8') as log_file:
     try:
         # --- Cria e escreve o cabeçalho no arquivo de log ---
@@ -99,6 +255,8 @@ with open(LOG_FILENAME, 'w', encoding='utf-8') as log_file:
 Taxa de Aprendizado (ALPHA): {ALPHA}
 Fator de Desconto (GAMMA):   {GAMMA}
 Fator de Decaimento (LAMBDA):  {LAMBDA}
+Modo de Atualização:         {UPDATE_MODE}
+Representação:               {f'tile coding ({N_TILINGS} grades)' if AGENT == 'tiles' else 'grade única'}
 
 --- Restrições Físicas ---
 Limite de Posição:    {POSITION_LIMIT}
@@ -106,7 +264,7 @@ Limite de Ângulo (rad): {ANGLE_LIMIT_RADS}
 Limite de Velocidade: {VELOCITY_LIMIT}
 Limite de Vel. Angular: {ANGULAR_VELOCITY_LIMIT}
 
---- Parâmetros de Exploração (Epsilon-Greedy) ---
+--- Parâmetros de Exploração ({EXPLORATION}{f', c={EXPLORATION_BONUS}' if EXPLORATION != 'epsilon' else ''}) ---
 Epsilon Inicial:      {EPSILON}
 Taxa de Decaimento:   {EPSILON_DECAY_RATE}
 Epsilon Mínimo:       {MIN_EPSILON}
@@ -117,18 +275,21 @@ Posição:     {N_POSITION} bins
 Velocidade:  {N_VELOCITY} bins
 Vel. Angular:{N_ANGULAR_VELOCITY} bins
 
+--- Repetição de Ação ---
+Passos por Decisão:   {ACTION_REPEAT}{' (máximo, modo adaptativo)' if ADAPTIVE_ACTION_REPEAT else ''}
+
 --- Configurações Gerais ---
 Episódios de Treino: {NUM_EPISODES}
 Passos Máximos por Episódio: {MAX_STEPS}
 Seed de Reprodutibilidade: {MASTER_SEED}
+Perfil da Máquina: {f"{HOST_PROFILE['blas_threads']} thread(s) de BLAS, {HOST_PROFILE['workers']} processo(s) ({HOST_PROFILE['host']})" if HOST_PROFILE else 'Não calibrado'}
+Warm Start: {WARM_START_FILENAME or 'Não'}
+Currículo Físico: {f'{len(CURRICULUM)} estágios' if CURRICULUM else 'Não'}
+Registrador de Voo: {f'a partir do episódio {FLIGHT_RECORDER_START_EPISODE}' if FLIGHT_RECORDER else 'Não'}
+Teste Sequencial (SPRT): {f'p1={EARLY_STOP_SUCCESS_RATE}, p0={EARLY_STOP_SUCCESS_RATE - SPRT_MARGIN:.2f}, α={SPRT_ALPHA}, β={SPRT_BETA}' if SEQUENTIAL_TEST else 'Não'}
 ======================================================================\n\n"""
         log_file.write(header)
 
-        # Inicializar tempo de treinamento e variáveis de early stopping
-        start_time = time.time()
-        recent_rewards = []
-        performance_history = []
-        
         for episode in range(NUM_EPISODES):
             # Reinicia o ambiente para cada episódio
             prev_observation, info = env.reset()
@@ -136,138 +297,173 @@ Seed de Reprodutibilidade: {MASTER_SEED}
             truncated = False
             total_reward = 0
 
+            # O agente escolhe a primeira ação com base na política epsilon-greedy
+            prev_state_idx = q_agent.convert2state(prev_observation)
+            action_idx = q_agent.begin_episode(prev_state_idx, epsilon)
+            if flight:
+                flight.reset()
+
             while not terminated and not truncated:
-                # O agente escolhe uma ação com base na política epsilon-greedy
-                prev_state_idx = q_agent.convert2state(prev_observation)
-                action_idx = q_agent.choose_action(prev_state_idx, epsilon)
 
                 # Mapeia o índice da ação para a força a ser aplicada
                 # Ação 0: Esquerda, Ação 1: Direita
-                action_force = [-FORCE_MAGNITUDE] if action_idx == 0 else [FORCE_MAGNITUDE]
+                action_force = [-force_magnitude] if action_idx == 0 else [force_magnitude]
                 
-                # Execute a ação.
-                observation, reward, terminated, truncated, info = env.step(action_force)
-                total_reward += reward
+                # Execute a ação, mantendo a força por até ACTION_REPEAT passos.
+                # A recompensa da decisão é a soma descontada r_1 + γ r_2 + ... + γ^(k-1) r_k.
+                decision_reward = 0.0
+                discount = 1.0
+                steps = 0
+                while True:
+                    observation, reward, terminated, truncated, info = env.step(action_force)
+                    total_reward += reward
+                    decision_reward += discount * reward
+                    discount *= GAMMA
+                    steps += 1
+                    current_state_idx = q_agent.convert2state(observation)
+                    if terminated or truncated or steps >= ACTION_REPEAT:
+                        break
+                    # Modo adaptativo: decide novamente assim que o estado discreto muda
+                    if ADAPTIVE_ACTION_REPEAT and current_state_idx != prev_state_idx:
+                        break
+                total_steps += steps
+                if recorder:
+                    recorder.append(prev_state_idx, action_idx, decision_reward, current_state_idx, terminated, steps)
+
+                # Decai o epsilon para reduzir a exploração ao longo do tempo (por passo simulado)
+                epsilon = max(MIN_EPSILON, epsilon - EPSILON_DECAY_RATE * steps)
                 
-                # Atualiza o agente de IA com a transição
-                current_state_idx = q_agent.convert2state(observation)
-                q_agent.update(prev_state_idx, action_idx, reward, current_state_idx)
+                # Atualiza o agente com a transição (s_t, a_t) -> s_{t+k} e escolhe a próxima ação
+                step_start = time.perf_counter()
+                next_action_idx = q_agent.step(current_state_idx, decision_reward, epsilon, steps,
+                                               done=terminated or truncated)
+                update_time += time.perf_counter() - step_start
+                if flight:
+                    flight.record(prev_observation, prev_state_idx, action_idx, decision_reward, q_agent.last_td_error)
+                action_idx = next_action_idx
+                if metrics:
+                    metrics.env_steps = total_steps
                 
-                # Guarda a observação atual para o próximo passo
+                # Guarda o estado atual para o próximo passo
+                prev_state_idx = current_state_idx
                 prev_observation = observation
 
-                # Decai o epsilon para reduzir a exploração ao longo do tempo
-                epsilon = max(MIN_EPSILON, epsilon - EPSILON_DECAY_RATE)
+            # Registrador de voo: só vai ao disco se o episódio falhou ou ficou abaixo do limiar
+            if flight and episode >= FLIGHT_RECORDER_START_EPISODE:
+                low_reward = FLIGHT_RECORDER_REWARD_THRESHOLD is not None and total_reward < FLIGHT_RECORDER_REWARD_THRESHOLD
+                if terminated or low_reward:
+                    flight_path = flight.dump(episode, {
+                        'reason': 'limite' if terminated else 'recompensa baixa',
+                        'violated_limits': violated_limits(observation, LIMITS),
+                        'final_observation': observation.tolist(),
+                        'total_reward': total_reward, 'epsilon': epsilon,
+                        'GRAVITY': gravity, 'FORCE_MAGNITUDE': force_magnitude,
+                    })
+                    if flight_path:
+                        log_file.write(f"Registrador de voo: episódio {episode + 1} salvo em '{flight_path}'\n")
+
+            # Atualiza as estatísticas de convergência (O(1)); a parada só é avaliada na física final
+            in_final_physics = curriculum is None or curriculum.is_final_stage
+            stop = monitor.update(episode, total_reward, check=in_final_physics)
+            if metrics:
+                metrics.episodes = episode + 1
+                metrics.epsilon = epsilon
+                metrics.success_rate = monitor.success_rate
+                metrics.update_time = update_time
 
-            # Armazenar recompensa para análise de early stopping
-            recent_rewards.append(total_reward)
-            if len(recent_rewards) > EARLY_STOP_WINDOW:
-                recent_rewards.pop(0)
+            # Treino federado: publica o snapshot e adota a média ponderada de todos os trabalhadores
+            if exchange and (episode + 1) % FEDERATED_SYNC_EPISODES == 0:
+                merged_workers = exchange.sync(q_agent)
+                sync_msg = f"Sincronização federada no episódio {episode + 1}: {merged_workers} trabalhador(es) combinados"
+                print(sync_msg)
+                log_file.write(sync_msg + '\n')
             
             # Função para gerar e salvar o log do episódio atual
             def log_current_episode():
                 # Calcular tempo decorrido
                 elapsed_time = time.time() - start_time
-                episodes_per_second = (episode + 1) / elapsed_time if elapsed_time > 0 else 0
                 
-                # Calcular taxa de sucesso sempre - inicia em 0.00%
-                if len(recent_rewards) == EARLY_STOP_WINDOW:
-                    successful_recent = sum(1 for r in recent_rewards if r >= EARLY_STOP_THRESHOLD)
-                    success_rate = successful_recent / EARLY_STOP_WINDOW
-                elif len(recent_rewards) > 0:
-                    # Calcula taxa baseada nos episódios disponíveis até agora
-                    successful_recent = sum(1 for r in recent_rewards if r >= EARLY_STOP_THRESHOLD)
-                    success_rate = successful_recent / len(recent_rewards)
-                else:
-                    # Nos primeiros episódios, taxa de sucesso é 0
-                    success_rate = 0.0
-                
-                success_rate_str = f", Taxa Sucesso: {success_rate:.2%}"
+                # Taxa de sucesso na janela recente (0.00% antes do primeiro episódio)
+                success_rate_str = f", Taxa Sucesso: {monitor.success_rate:.2%}"
                 
                 # Log simplificado - episódio, taxa de sucesso, recompensa e epsilon
                 log_message = f"Episódio: {episode + 1:4}/{NUM_EPISODES}{success_rate_str:22}, Recompensa: {total_reward:4}, Epsilon: {epsilon:.5f}, Tempo: {elapsed_time:.0f}s"
                 
                 print(log_message)
                 log_file.write(log_message + '\n')
-                return success_rate
+                return monitor.success_rate
             
             # Print do episódio se for múltiplo de 50 ou se for o último episódio
             should_log_this_episode = (episode + 1) % 50 == 0 or episode + 1 == NUM_EPISODES
             if should_log_this_episode:
                 current_success_rate = log_current_episode()
-            
-            # Critério 1: Performance consistente
-            if episode >= MIN_EPISODES and len(recent_rewards) == EARLY_STOP_WINDOW:
-                successful_episodes = sum(1 for r in recent_rewards if r >= EARLY_STOP_THRESHOLD)
-                success_rate = successful_episodes / EARLY_STOP_WINDOW
-                
-                if success_rate >= EARLY_STOP_SUCCESS_RATE:
-                    # Se não logamos neste episódio ainda, fazer o log antes do break
-                    if not should_log_this_episode:
-                        log_current_episode()
-                    
-                    early_stop_msg = f"""\n======================================================================
-                    EARLY STOPPING - CONVERGÊNCIA DETECTADA
-======================================================================
-Episódio: {episode + 1}
-Taxa de Sucesso: {success_rate:.2%} (últimos {EARLY_STOP_WINDOW} episódios)
-Recompensa Média: {np.mean(recent_rewards):.2f}
-Critério: {successful_episodes}/{EARLY_STOP_WINDOW} episódios com recompensa ≥ {EARLY_STOP_THRESHOLD}
-======================================================================"""
-                    print(early_stop_msg)
-                    log_file.write(early_stop_msg + '\n')
-                    break
 
-            if (episode + 1) % 50 == 0:
-                current_avg = np.mean(recent_rewards) if recent_rewards else 0
-                performance_history.append(current_avg)
+            # Currículo: avança de estágio por agenda ou por desempenho
+            if curriculum and curriculum.step(monitor.success_rate):
+                gravity = curriculum.current['GRAVITY']
+                force_magnitude = curriculum.current['FORCE_MAGNITUDE']
+                apply_physics(env, gravity)
+                # As janelas de desempenho recomeçam, pois refletem a física anterior
+                monitor.reset()
+
+                stage_msg = f"--- Currículo: estágio {curriculum.stage_idx + 1}/{len(curriculum.stages)} no episódio {episode + 1} (GRAVITY={gravity}, FORCE_MAGNITUDE={force_magnitude}) ---"
+                print(stage_msg)
+                log_file.write(stage_msg + '\n')
+                continue
+
+            # Early stopping: primeiro critério satisfeito (sucesso, platô ou teste sequencial)
+            if stop:
+                criterion, details = stop
+                # Se não logamos neste episódio ainda, fazer o log antes do break
+                if not should_log_this_episode:
+                    log_current_episode()
                 
-                # Critério 2: Detecção de platô
-                if len(performance_history) >= PLATEAU_WINDOW // 100:
-                    recent_performance = performance_history[-5:]  # Últimos 500 episódios
-                    if len(recent_performance) >= 3:
-                        performance_range = max(recent_performance) - min(recent_performance)
-                        plateau_avg = np.mean(recent_performance)
-                        
-                        if performance_range <= PLATEAU_TOLERANCE and plateau_avg >= EARLY_STOP_THRESHOLD * 0.9:
-                            # Se não logamos neste episódio ainda, fazer o log antes do break
-                            if not should_log_this_episode:
-                                log_current_episode()
-                            
-                            early_stop_msg = f"""\n======================================================================
-                    EARLY STOPPING - PLATÔ DETECTADO
+                early_stop_msg = f"""\n======================================================================
+                    {criterion.title}
 ======================================================================
 Episódio: {episode + 1}
-Performance Estabilizada: {plateau_avg:.2f}
-Variação nos últimos {PLATEAU_WINDOW} episódios: {performance_range:.2f}
-Sem melhoria significativa detectada.
+{details}
 ======================================================================"""
-                            print(early_stop_msg)
-                            log_file.write(early_stop_msg + '\n')
-                            break
+                print(early_stop_msg)
+                log_file.write(early_stop_msg + '\n')
+                break
+
+        training_status = 'completed'
+    except KeyboardInterrupt:
+        training_status = 'interrupted'
+        raise
 
     finally:
         # Garante que o ambiente será fechado ao final.
         env.close()
+        if recorder:
+            recorder.close()
+            print(f"{recorder.total} transições gravadas em '{recorder.path}'.")
+        if flight and flight.dumps:
+            print(f"Registrador de voo: {flight.dumps} episódio(s) salvos, os {len(flight.saved)} mais recentes mantidos em '{flight.directory}/'.")
         
         # Calcular tempo total de treinamento
         total_training_time = time.time() - start_time
         episodes_total = episode + 1
         avg_speed = episodes_total / total_training_time if total_training_time > 0 else 0
+        steps_per_second = total_steps / total_training_time if total_training_time > 0 else 0
         
         final_message1 = "Treinamento concluído. Salvando os valores Q..."
         print(final_message1)
-        print(f"Tempo total: {total_training_time:.0f}s, Velocidade média: {avg_speed:.2f}ep/s")
+        print(f"Tempo total: {total_training_time:.0f}s, Velocidade média: {avg_speed:.2f}ep/s, {steps_per_second:.0f} passos/s")
         
         log_file.write(final_message1 + '\n')
         log_file.write(f"Tempo total de treinamento: {total_training_time:.2f} segundos\n")
         log_file.write(f"Velocidade média: {avg_speed:.2f} episódios por segundo\n")
+        log_file.write(f"Passos simulados: {total_steps} ({steps_per_second:.0f} passos por segundo)\n")
+        if total_training_time > 0:
+            log_file.write(f"Tempo na atualização do agente: {update_time:.2f}s ({update_time / total_training_time:.1%})\n")
         
         # Resumo de performance final
-        if recent_rewards:
-            final_avg = np.mean(recent_rewards)
-            final_successful = sum(1 for r in recent_rewards if r >= EARLY_STOP_THRESHOLD)
-            final_success_rate = final_successful / len(recent_rewards)
+        final_avg = final_success_rate = None
+        if monitor.rewards.count:
+            final_avg = monitor.mean_reward
+            final_success_rate = monitor.success_rate
             
             summary = f"""\n--- RESUMO DE PERFORMANCE FINAL ---
 Episódios Executados: {episode + 1}
@@ -283,8 +479,8 @@ Epsilon Final: {epsilon:.6f}
         data_to_save = {
             'q_matrix': q_agent.q_matrix,
             'params': {
-                'GRAVITY': GRAVITY,
-                'FORCE_MAGNITUDE': FORCE_MAGNITUDE,
+                'GRAVITY': gravity,
+                'FORCE_MAGNITUDE': force_magnitude,
                 'POSITION_LIMIT': POSITION_LIMIT,
                 'ANGLE_LIMIT_RADS': ANGLE_LIMIT_RADS,
                 'VELOCITY_LIMIT': VELOCITY_LIMIT,
@@ -297,10 +493,27 @@ Epsilon Final: {epsilon:.6f}
                 'GAMMA': GAMMA,
                 'LAMBDA': LAMBDA,
                 'MAX_STEPS': MAX_STEPS,
-                'MASTER_SEED': MASTER_SEED
+                'MASTER_SEED': MASTER_SEED,
+                'ACTION_REPEAT': ACTION_REPEAT,
+                'ADAPTIVE_ACTION_REPEAT': ADAPTIVE_ACTION_REPEAT,
+                'EXPLORATION': EXPLORATION,
+                'UPDATE_MODE': UPDATE_MODE,
+                'AGENT': AGENT,
+                'N_TILINGS': N_TILINGS,
+                'CURRICULUM': CURRICULUM,
+                'WARM_START_FILENAME': WARM_START_FILENAME,
+                # Identifica o treino no registro (run_registry.py confere RUN_ID antes de reaproveitar o arquivo)
+                'CONFIG_HASH': CONFIG_HASH,
+                'RUN_ID': run_id,
+                # Estado final do treino, para retomar a partir deste arquivo
+                'EPISODES': episodes_total,
+                'EPSILON_FINAL': epsilon
             }
         }
         
+        if q_agent.visit_counts is not None:
+            data_to_save['visit_counts'] = q_agent.visit_counts
+
         # Salva o dicionário em um arquivo binário NumPy.
         np.save(OUTPUT_FILENAME, data_to_save)
         
@@ -308,6 +521,12 @@ Epsilon Final: {epsilon:.6f}
         print(final_message2)
         log_file.write(final_message2 + '\n')
 
+        # Registra o resultado no índice de treinos
+        registry.finish_run(run_id, training_status, episodes_total, total_steps, total_training_time,
+                            final_avg_reward=None if final_avg is None else float(final_avg),
+                            final_success_rate=final_success_rate)
+        registry.close()
+
 # Gerar gráfico da variação de recompensa usando o módulo grafico.py
 print("\nGerando gráfico de desempenho...")
 try:
@@ -0,0 +1,80 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+
+def _encoder_loop(frame_queue, fps):
+    """
+    Laço do processo codificador: consome as mensagens da fila e escreve os vídeos.
+    Mensagens: ('start', caminho), ('frame', imagem), ('end', caminho) e None para encerrar.
+    """
+    try:
+        import imageio
+    except ImportError:
+        imageio = None
+        print("ERRO: 'imageio' não está instalado (pip install imageio[ffmpeg]); os vídeos serão descartados.")
+
+    writer = None
+    while True:
+        message = frame_queue.get()
+        if message is None:
+            break
+        kind, payload = message
+        if kind == 'start' and imageio is not None:
+            try:
+                writer = imageio.get_writer(payload, fps=fps)
+            except Exception as e:
+                print(f"ERRO ao criar o vídeo '{payload}': {e}")
+                writer = None
+        elif kind == 'frame' and writer is not None:
+            writer.append_data(payload)
+        elif kind == 'end' and writer is not None:
+            writer.close()
+            writer = None
+            print(f"Vídeo salvo em '{payload}'.")
+
+    if writer is not None:
+        writer.close()
+
+class VideoRecorder():
+    """
+    Grava vídeos de episódios escolhidos sem bloquear a simulação.
+    Os quadros 'rgb_array' passam por uma fila limitada para um processo separado que
+    faz a codificação; o laço de avaliação só paga a renderização e a cópia do quadro.
+    Se o codificador ficar para trás, a fila cheia segura o laço, limitando a memória usada.
+    """
+
+    def __init__(self, output_dir, fps, max_queue=256, extension='mp4'):
+        self.output_dir = output_dir
+        self.extension = extension
+        self.path = None
+        os.makedirs(output_dir, exist_ok=True)
+        if 'fork' in mp.get_all_start_methods():
+            # 'fork' evita que o processo filho reexecute o script principal (test.py não tem main)
+            context = mp.get_context('fork')
+            self.queue = context.Queue(maxsize=max_queue)
+            self.process = context.Process(target=_encoder_loop, args=(self.queue, fps), daemon=True)
+        else:
+            # Sem fork (Windows): a codificação fica em uma thread; o ffmpeg do imageio roda à parte
+            self.queue = queue.Queue(maxsize=max_queue)
+            self.process = threading.Thread(target=_encoder_loop, args=(self.queue, fps), daemon=True)
+        self.process.start()
+
+    def start_episode(self, name):
+        """Abre um novo vídeo em output_dir/<name>.<extensão>."""
+        self.path = os.path.join(self.output_dir, f"{name}.{self.extension}")
+        self.queue.put(('start', self.path))
+
+    def add_frame(self, frame):
+        self.queue.put(('frame', frame))
+
+    def end_episode(self):
+        if self.path is not None:
+            self.queue.put(('end', self.path))
+            self.path = None
+
+    def close(self):
+        """Finaliza o vídeo aberto e espera o codificador esvaziar a fila."""
+        self.end_episode()
+        self.queue.put(None)
+        self.process.join()